@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+--------------------------------------------------------------------------------
+Benchmark_GTF_Parsing Script
+--------------------------------------------------------------------------------
+Overview:
+Compares the GTF parsing engine of Transcripts_Plots.py against the original
+parser (full tokenizing and attribute parsing of every line). The bundled
+Data/*.gtf files are replicated, with renamed transcript IDs, until the
+annotation approaches the size of a whole-genome GTF.
+--------------------------------------------------------------------------------
+"""
+#-------------------------------------------------------------------------------
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import time
+#-------------------------------------------------------------------------------
+# Locating the Repository Files
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+data_dir = os.path.join(repo_dir, "Data")
+script_path = os.path.join(repo_dir, "Transcripts_Plots.py")
+
+spec = importlib.util.spec_from_file_location("Transcripts_Plots", script_path)
+tp = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tp)
+#-------------------------------------------------------------------------------
+
+def legacy_parse_gtf(gtf_file, transcript_id):
+    """
+    The original parser: every line is split and its attributes are fully
+    parsed before the transcript_id is compared.
+    """
+    entries = []
+    with open(gtf_file, 'r') as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            parts = line.strip().split("\t")
+            if len(parts) != 9:
+                sys.exit(f"Error: The GTF file {gtf_file} does not have 9 tab-delimited fields.")
+            attr_dict = tp.parse_attributes(parts[8])
+            tid = attr_dict.get('transcript_id', '').split('.')[0]
+            if tid != transcript_id:
+                continue
+            entries.append({
+                'feature': parts[2],
+                'start': int(parts[3]),
+                'end': int(parts[4]),
+                'strand': parts[6],
+                'attributes': attr_dict
+            })
+    return entries
+
+def write_scaled_gtf(out_file, copies):
+    """
+    Concatenate the bundled GTF files 'copies' times, renaming the Ensembl IDs
+    of each copy so that every transcript remains unique.
+    Return the number of lines written.
+    """
+    source_lines = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith(".gtf"):
+            with open(os.path.join(data_dir, name)) as f:
+                source_lines.extend(f.readlines())
+    with open(out_file, 'w') as out:
+        for copy in range(copies):
+            prefix = f"ENSTC{copy:05d}"
+            out.writelines(line.replace("ENST", prefix) for line in source_lines)
+    return len(source_lines) * copies
+
+def best_time(func, repeats):
+    """
+    Return the best wall time (in seconds) of 'repeats' calls to func.
+    """
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GTF parsing on scaled-up bundled GTF files.")
+    parser.add_argument(
+      "--copies",
+      type=int,
+      default=1000,
+      help="Number of copies of the bundled GTF files (default: 1000, about 1.2M lines)"
+    )
+    parser.add_argument(
+      "--repeats",
+      type=int,
+      default=3,
+      help="Number of timed repeats per measurement (best time is reported)"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        gtf_file = os.path.join(tmp_dir, "scaled.gtf")
+        n_lines = write_scaled_gtf(gtf_file, args.copies)
+        # A transcript from the last copy, so that the whole file is scanned.
+        transcript_id = f"ENSTC{args.copies - 1:05d}00000380152"
+        print(f"GTF lines: {n_lines:,}")
+
+        legacy = legacy_parse_gtf(gtf_file, transcript_id)
+        current = tp.parse_gtf(gtf_file, transcript_id)
+        for feature in tp.PLOTTED_FEATURES:
+            assert [(e['start'], e['end']) for e in legacy if e['feature'] == feature] == \
+                   list(zip(current.starts[feature], current.ends[feature])), "Parsers disagree"
+
+        t_legacy = best_time(lambda: legacy_parse_gtf(gtf_file, transcript_id), args.repeats)
+        t_current = best_time(lambda: tp.parse_gtf(gtf_file, transcript_id), args.repeats)
+        print(f"{'parser':<12}{'seconds':>10}{'lines/s':>16}")
+        print(f"{'legacy':<12}{t_legacy:>10.3f}{n_lines / t_legacy:>16,.0f}")
+        print(f"{'current':<12}{t_current:>10.3f}{n_lines / t_current:>16,.0f}")
+        print(f"Speedup: {t_legacy / t_current:.1f}x")
+
+if __name__ == "__main__":
+    main()
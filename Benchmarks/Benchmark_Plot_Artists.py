@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+--------------------------------------------------------------------------------
+Benchmark_Plot_Artists Script
+--------------------------------------------------------------------------------
+Overview:
+Compares the collection-based drawing of plot_transcript in Transcripts_Plots.py
+against the original drawing code (one Rectangle patch per feature and one
+ax.plot call per intron) on synthetic transcripts with increasing numbers of
+exons. Reports the number of artists and the plot and savefig times.
+--------------------------------------------------------------------------------
+"""
+#-------------------------------------------------------------------------------
+import argparse
+import importlib.util
+import io
+import os
+import time
+#-------------------------------------------------------------------------------
+# Locating the Repository Files
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+script_path = os.path.join(repo_dir, "Transcripts_Plots.py")
+
+spec = importlib.util.spec_from_file_location("Transcripts_Plots", script_path)
+tp = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tp)
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+#-------------------------------------------------------------------------------
+
+def synthetic_exons(n_exons, exon_length=150, intron_length=2000):
+    """
+    Return the exons of a plus-strand transcript with n_exons exons, as the
+    FeatureArray produced by process_features.
+    """
+    entries = tp.TranscriptEntries('gene_name "SYNTH";', '+')
+    start = 1000000
+    for _ in range(n_exons):
+        entries.append('exon', start, start + exon_length)
+        start += exon_length + intron_length
+    exons, _ = tp.process_features(entries)
+    return exons
+
+def plot_options(full_scale):
+    """
+    Return the plotting options (as parsed by main) with their default values.
+    """
+    return argparse.Namespace(
+        full_scale=full_scale,
+        print_transcript_label=True,
+        transcript_fontsize=18,
+        exon_color="#305c96",
+        CDS_color="#b38d1b",
+        labels="full",
+        figsize=[10, 8],
+        dynamic_resize=False,
+        dpi=[72]
+    )
+
+def legacy_plot(features, args):
+    """
+    The original drawing code: one patch per feature and one line per intron,
+    on top of the same figure layout as plot_transcript.
+    """
+    fig, ax = plt.subplots(figsize=args.figsize)
+    plt.subplots_adjust(left=0.08, right=0.98, top=0.60, bottom=0.12)
+    scaled_start, scaled_end = tp.scale_coordinates(features, args.full_scale)
+    for x, x_end in zip(scaled_start.tolist(), scaled_end.tolist()):
+        ax.add_patch(plt.Rectangle((x, 0.5), x_end - x, 0.3, color=args.exon_color, ec='black'))
+    for i in range(1, len(scaled_start)):
+        ax.plot([scaled_end[i-1], scaled_start[i]], [0.65, 0.65], linestyle=(0, (1, 1)), color='gray')
+    ax.set_xlim(scaled_start[0] - 10, scaled_end[-1] + 10)
+    ax.set_ylim(0, 2)
+    ax.axis('off')
+    return fig
+
+def current_plot(features, args):
+    """
+    The collection-based drawing code of plot_transcript.
+    """
+    return tp.plot_transcript(features, args, "ENSTSYNTH", "SYNTH", plot_feature="exons")
+
+def measure(plot_func, features, args, fmt):
+    """
+    Return (artists, plot_seconds, savefig_seconds) for one plot.
+    """
+    start = time.perf_counter()
+    fig = plot_func(features, args)
+    plotted = time.perf_counter()
+    ax = fig.axes[0]
+    artists = len(ax.patches) + len(ax.lines) + len(ax.collections)
+    fig.savefig(io.BytesIO(), format=fmt, dpi=72, bbox_inches='tight', pad_inches=0.05)
+    saved = time.perf_counter()
+    plt.close(fig)
+    return artists, plotted - start, saved - plotted
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-feature artists against collections in plot_transcript.")
+    parser.add_argument(
+      "--exons",
+      nargs="+",
+      type=int,
+      default=[10, 100, 363, 1000, 3000],
+      help="Exon counts of the synthetic transcripts (default: 10 100 363 1000 3000)"
+    )
+    parser.add_argument(
+      "--format",
+      type=str,
+      choices=["pdf", "png", "svg"],
+      default="png",
+      help="Output format used for savefig (written to memory)"
+    )
+    parser.add_argument(
+      "--full_scale",
+      action="store_true",
+      default=False,
+      help="Plot to full scale instead of compressing introns"
+    )
+    args = parser.parse_args()
+    options = plot_options(args.full_scale)
+
+    print(f"{'exons':>6}  {'drawing':<8}{'artists':>9}{'plot s':>10}{'savefig s':>11}")
+    for n_exons in args.exons:
+        features = synthetic_exons(n_exons)
+        for name, plot_func in (("legacy", legacy_plot), ("current", current_plot)):
+            artists, plot_time, save_time = measure(plot_func, features, options, args.format)
+            print(f"{n_exons:>6}  {name:<8}{artists:>9}{plot_time:>10.3f}{save_time:>11.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+--------------------------------------------------------------------------------
+Benchmark_Suite Script
+--------------------------------------------------------------------------------
+Overview:
+Times each stage of Transcripts_Plots.py separately on synthetic GTF files
+(see Generate_Synthetic_GTF.py) of several shapes:
+    parse_gtf:        single-transcript lookup (a full scan of the GTF)
+    stream_gtf:       whole-annotation streaming (as in --all)
+    process_features: splitting and ordering the features of sampled transcripts
+    plot_transcript:  drawing the exons of sampled transcripts
+    savefig_<format>: saving those figures, once per output format
+Throughput (lines/s or plots/s) and peak memory are reported for every stage,
+and the results are saved as JSON so that versions can be compared with
+--compare.
+--------------------------------------------------------------------------------
+"""
+#-------------------------------------------------------------------------------
+import argparse
+import datetime
+import importlib.util
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+#-------------------------------------------------------------------------------
+# Locating the Repository Files
+benchmarks_dir = os.path.dirname(os.path.abspath(__file__))
+repo_dir = os.path.dirname(benchmarks_dir)
+script_path = os.path.join(repo_dir, "Transcripts_Plots.py")
+
+spec = importlib.util.spec_from_file_location("Transcripts_Plots", script_path)
+tp = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(tp)
+
+sys.path.insert(0, benchmarks_dir)
+from Generate_Synthetic_GTF import SHAPES, write_synthetic_gtf
+#-------------------------------------------------------------------------------
+
+def plot_options():
+    """
+    Return the plotting options (as parsed by main) with their default values.
+    """
+    return argparse.Namespace(
+        full_scale=False,
+        print_transcript_label=True,
+        transcript_fontsize=18,
+        exon_color="#305c96",
+        CDS_color="#b38d1b",
+        labels="full",
+        figsize=[10, 8],
+        dynamic_resize=False
+    )
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process so far, in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_stage(func, repeats, trace_memory, discard=None):
+    """
+    Call func 'repeats' times and return (best_seconds, traced_peak_mb, result)
+    where result is the return value of the last call (the results of earlier
+    calls are passed to discard, if given). traced_peak_mb, the peak of Python
+    allocations during one call, is None unless trace_memory is set, in which
+    case the timings include the tracemalloc overhead.
+    """
+    best = None
+    traced_peak = None
+    result = None
+    for repeat in range(repeats):
+        if repeat and discard is not None:
+            discard(result)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if trace_memory:
+            traced_peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, traced_peak, result
+
+def stage_record(stage, seconds, items, unit, traced_peak):
+    """
+    Return the result record of one stage.
+    """
+    return {
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'items': items,
+        'unit': unit,
+        'throughput': round(items / seconds, 2) if seconds > 0 else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'traced_peak_mb': round(traced_peak, 1) if traced_peak is not None else None,
+    }
+
+def sample_ids(transcript_ids, sample):
+    """
+    Return up to 'sample' transcript IDs evenly spread over the file.
+    """
+    step = max(1, len(transcript_ids) // sample)
+    return transcript_ids[::step][:sample]
+
+def benchmark_shape(shape, args, tmp_dir):
+    """
+    Generate a GTF of the given shape and time every stage on it.
+    Return the result record of the shape.
+    """
+    gtf_file = os.path.join(tmp_dir, f"{shape}.gtf")
+    n_lines, transcript_ids = write_synthetic_gtf(gtf_file, shape, args.lines, args.seed)
+    print(f"{shape}: {n_lines:,} lines, {len(transcript_ids):,} transcripts")
+    stages = []
+
+    def record(stage, func, items, unit, discard=None):
+        seconds, traced_peak, result = run_stage(func, args.repeats, args.trace_memory, discard)
+        stages.append(stage_record(stage, seconds, items, unit, traced_peak))
+        return result
+
+    # The last transcript, so that the whole file is scanned.
+    record("parse_gtf", lambda: tp.parse_gtf(gtf_file, transcript_ids[-1]), n_lines, "lines")
+    record("stream_gtf", lambda: sum(1 for _ in tp.stream_gtf_transcripts(gtf_file)), n_lines, "lines")
+
+    sampled = sample_ids(transcript_ids, args.sample)
+    entries = tp.parse_gtf_transcripts(gtf_file, sampled)
+    features = record("process_features",
+                      lambda: [tp.process_features(entries[tid])[0] for tid in sampled],
+                      len(sampled), "transcripts")
+
+    options = plot_options()
+    def plot_all():
+        return [tp.plot_transcript(exons, options, tid, tid, plot_feature="exons")
+                for tid, exons in zip(sampled, features)]
+    def close_all(figs):
+        for fig in figs:
+            tp.plt.close(fig)
+    figs = record("plot_transcript", plot_all, len(sampled), "plots", discard=close_all)
+
+    for fmt in args.format:
+        def save_all():
+            for fig in figs:
+                fig.savefig(io.BytesIO(), format=fmt, dpi=args.dpi, bbox_inches='tight', pad_inches=0.05)
+        record(f"savefig_{fmt}", save_all, len(figs), "plots")
+    close_all(figs)
+
+    gtf_bytes = os.path.getsize(gtf_file)
+    os.remove(gtf_file)
+    return {
+        'shape': shape,
+        'lines': n_lines,
+        'transcripts': len(transcript_ids),
+        'bytes': gtf_bytes,
+        'sampled_transcripts': len(sampled),
+        'sampled_exons': int(sum(len(exons) for exons in features)),
+        'stages': stages,
+    }
+
+def print_results(shape_results):
+    """
+    Print a table of the stage results of every shape.
+    """
+    print(f"{'shape':<7}{'stage':<18}{'seconds':>10}{'throughput':>16}  {'unit':<13}{'peak RSS MiB':>13}")
+    for result in shape_results:
+        for stage in result['stages']:
+            print(f"{result['shape']:<7}{stage['stage']:<18}{stage['seconds']:>10.3f}"
+                  f"{stage['throughput']:>16,.1f}  {stage['unit'] + '/s':<13}{stage['peak_rss_mb']:>13.1f}")
+
+def compare_results(baseline, shape_results):
+    """
+    Print the throughput of every stage relative to a baseline results file
+    (>1 means faster than the baseline).
+    """
+    base = {(result['shape'], stage['stage']): stage['throughput']
+            for result in baseline['shapes'] for stage in result['stages']}
+    print(f"Compared with version {baseline['script_version']} ({baseline['date']}):")
+    print(f"{'shape':<7}{'stage':<18}{'speedup':>9}")
+    for result in shape_results:
+        for stage in result['stages']:
+            base_throughput = base.get((result['shape'], stage['stage']))
+            if base_throughput and stage['throughput']:
+                print(f"{result['shape']:<7}{stage['stage']:<18}{stage['throughput'] / base_throughput:>8.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each stage of Transcripts_Plots.py on synthetic GTF files.")
+    parser.add_argument(
+      "--shapes",
+      nargs="+",
+      type=str,
+      choices=sorted(SHAPES),
+      default=["short", "long", "mixed"],
+      help="Annotation shapes to benchmark (default: short long mixed)"
+    )
+    parser.add_argument(
+      "--lines",
+      type=int,
+      default=1000000,
+      help="Approximate number of GTF lines per shape (default: 1000000)"
+    )
+    parser.add_argument(
+      "--sample",
+      type=int,
+      default=20,
+      help="Number of transcripts processed, plotted and saved per shape (default: 20)"
+    )
+    parser.add_argument(
+      "--format",
+      nargs="+",
+      type=str,
+      choices=["pdf", "png", "svg"],
+      default=["pdf", "png", "svg"],
+      help="Output formats timed by savefig, written to memory (default: pdf png svg)"
+    )
+    parser.add_argument(
+      "--dpi",
+      type=int,
+      default=300,
+      help="Resolution used by savefig (default: 300)"
+    )
+    parser.add_argument(
+      "--repeats",
+      type=int,
+      default=1,
+      help="Number of timed repeats per stage (best time is reported; default: 1)"
+    )
+    parser.add_argument(
+      "--seed",
+      type=int,
+      default=1,
+      help="Random seed of the synthetic GTF files (default: 1)"
+    )
+    parser.add_argument(
+      "--trace_memory",
+      action="store_true",
+      default=False,
+      help="Also record the peak Python allocations of each stage with tracemalloc (slows down the timings)"
+    )
+    parser.add_argument(
+      "--json",
+      type=str,
+      default="Benchmark_Suite_Results.json",
+      help="Output JSON file (default: Benchmark_Suite_Results.json)"
+    )
+    parser.add_argument(
+      "--compare",
+      type=str,
+      metavar="JSON",
+      help="Results file of an earlier run to compare throughputs against"
+    )
+    args = parser.parse_args()
+    if args.sample < 1 or args.repeats < 1:
+        sys.exit("Error: --sample and --repeats must be at least 1.")
+
+    # Import the plotting modules up front, so that the first timed stage of
+    # the first shape does not include their import time.
+    tp.import_plotting_modules()
+    import matplotlib
+    import numpy
+    shape_results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for shape in args.shapes:
+            shape_results.append(benchmark_shape(shape, args, tmp_dir))
+    print_results(shape_results)
+
+    results = {
+        'script_version': tp.script_version,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'matplotlib': matplotlib.__version__,
+        'platform': platform.platform(),
+        'options': vars(args),
+        'shapes': shape_results,
+    }
+    with open(args.json, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results saved to {args.json}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(json.load(f), shape_results)
+
+if __name__ == "__main__":
+    main()
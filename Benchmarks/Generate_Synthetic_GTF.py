@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+--------------------------------------------------------------------------------
+Generate_Synthetic_GTF Script
+--------------------------------------------------------------------------------
+Overview:
+Writes synthetic, Ensembl-like GTF files of a requested size (up to millions of
+lines) for benchmarking Transcripts_Plots.py. Three annotation shapes are
+supported:
+    short: many short transcripts (2-12 exons each), plus strand
+    long:  a few transcripts with thousands of exons each
+    mixed: transcripts with 1-60 exons on both strands
+Files are sorted by position and grouped by gene, like Ensembl/GENCODE GTFs,
+and are fully determined by the shape, size and seed.
+--------------------------------------------------------------------------------
+"""
+#-------------------------------------------------------------------------------
+import argparse
+import random
+#-------------------------------------------------------------------------------
+# Defining Annotation Shapes (exon count range and strands of each transcript)
+SHAPES = {
+    "short": {'exons': (2, 12), 'strands': "+"},
+    "long": {'exons': (2000, 5000), 'strands': "+"},
+    "mixed": {'exons': (1, 60), 'strands': "+-"},
+}
+#-------------------------------------------------------------------------------
+
+def gtf_line(chrom, feature, start, end, strand, attributes):
+    """
+    Format one GTF line from its fields and an attribute string.
+    """
+    frame = "0" if feature == "CDS" else "."
+    return f"{chrom}\tsynthetic\t{feature}\t{start}\t{end}\t.\t{strand}\t{frame}\t{attributes}\n"
+
+def transcript_lines(rng, gene_number, chrom, position, strand, n_exons):
+    """
+    Return the GTF lines (gene, transcript, exons and CDS) of one single-transcript
+    gene starting at position, and the position where the gene ends.
+    """
+    gene_id = f"ENSGSYN{gene_number:09d}"
+    transcript_id = f"ENSTSYN{gene_number:09d}"
+    gene_attributes = (f'gene_id "{gene_id}"; gene_version "1"; gene_name "SYN{gene_number}"; '
+                       f'gene_source "synthetic"; gene_biotype "protein_coding";')
+    transcript_attributes = (f'gene_id "{gene_id}"; gene_version "1"; transcript_id "{transcript_id}"; '
+                             f'transcript_version "1"; gene_name "SYN{gene_number}"; gene_source "synthetic"; '
+                             f'gene_biotype "protein_coding"; transcript_name "SYN{gene_number}-201"; '
+                             f'transcript_source "synthetic"; transcript_biotype "protein_coding";')
+    exons = []
+    cursor = position
+    for _ in range(n_exons):
+        length = rng.randint(50, 400)
+        exons.append((cursor, cursor + length))
+        cursor += length + rng.randint(100, 5000)
+    gene_end = exons[-1][1]
+    lines = [
+        gtf_line(chrom, "gene", position, gene_end, strand, gene_attributes),
+        gtf_line(chrom, "transcript", position, gene_end, strand, transcript_attributes),
+    ]
+    # Exons are numbered 5' to 3', so minus-strand exon numbers run backwards.
+    numbers = range(1, n_exons + 1) if strand == "+" else range(n_exons, 0, -1)
+    for number, (start, end) in zip(numbers, exons):
+        exon_attributes = f'{transcript_attributes} exon_number "{number}"; exon_id "ENSESYN{gene_number:09d}{number:05d}";'
+        lines.append(gtf_line(chrom, "exon", start, end, strand, exon_attributes))
+        # Every exon but the first and last one is entirely coding.
+        if 1 < number < n_exons:
+            lines.append(gtf_line(chrom, "CDS", start, end, strand, f'{transcript_attributes} exon_number "{number}";'))
+    return lines, gene_end
+
+def write_synthetic_gtf(out_file, shape, n_lines, seed=1):
+    """
+    Write a synthetic GTF file of the given shape with (at least) n_lines lines,
+    stopping at the first gene boundary past n_lines.
+    Return (lines_written, transcript_ids) with the transcript IDs in file order.
+    """
+    rng = random.Random(seed)
+    params = SHAPES[shape]
+    transcript_ids = []
+    lines_written = 0
+    gene_number = 0
+    position = 10000
+    with open(out_file, 'w') as out:
+        out.write(f"#!synthetic GTF, shape={shape}, seed={seed}\n")
+        while lines_written < n_lines:
+            gene_number += 1
+            strand = rng.choice(params['strands'])
+            n_exons = rng.randint(*params['exons'])
+            lines, gene_end = transcript_lines(rng, gene_number, "1", position, strand, n_exons)
+            out.writelines(lines)
+            lines_written += len(lines)
+            transcript_ids.append(f"ENSTSYN{gene_number:09d}")
+            position = gene_end + rng.randint(1000, 20000)
+    return lines_written, transcript_ids
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic GTF file for benchmarking.")
+    parser.add_argument(
+      "output",
+      type=str,
+      help="Output GTF file"
+    )
+    parser.add_argument(
+      "--shape",
+      type=str,
+      choices=sorted(SHAPES),
+      default="mixed",
+      help="Annotation shape (default: mixed)"
+    )
+    parser.add_argument(
+      "--lines",
+      type=int,
+      default=1000000,
+      help="Approximate number of GTF lines (default: 1000000)"
+    )
+    parser.add_argument(
+      "--seed",
+      type=int,
+      default=1,
+      help="Random seed (default: 1)"
+    )
+    args = parser.parse_args()
+    lines_written, transcript_ids = write_synthetic_gtf(args.output, args.shape, args.lines, args.seed)
+    print(f"Wrote {lines_written:,} lines ({len(transcript_ids):,} transcripts) to {args.output}")
+
+if __name__ == "__main__":
+    main()
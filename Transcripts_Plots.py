@@ -36,307 +36,2644 @@ Version: 1.0.3
 import os
 import sys
 #-------------------------------------------------------------------------------
-# Dependency checking
+# Dependency checking (see check_dependencies; importing this module never exits)
 required_modules = {
-    "pip": "python3 -m pip install -U pip",
     "matplotlib": "python3 -m pip install -U matplotlib",
 }
-
-for module, install_cmd in required_modules.items():
-    try:
-        __import__(module)
-    except ImportError:
-        sys.exit(f"Error: The '{module}' module is not installed.\nPlease install it using:\n    {install_cmd}\n")
 #-------------------------------------------------------------------------------
 # Import dependencies
+# matplotlib and numpy are imported on first use (see import_plotting_modules).
 import argparse
-import matplotlib.pyplot as plt
-from textwrap import dedent
-from packaging import version
+import gzip
+import hashlib
+import io
+import json
+import mmap
+import queue
+import re
+import shutil
+import struct
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import OrderedDict, deque
+#-------------------------------------------------------------------------------
 #-------------------------------------------------------------------------------
 # Defining Script Name
 script_name = os.path.basename(sys.argv[0])
 
-# Defining Script Current Version
-script_version = "1.0.3"
+# Defining Script Current Version
+script_version = "1.0.3"
+
+# Defining_Script_Current_Version (date '+DATE:%Y/%m/%d%tTIME:%R')
+current_version_date = "DATE:2025/04/24"
+
+# Defining GTF Index Sidecar Suffix, Magic Number and Format Version
+GTF_INDEX_SUFFIX = ".tpidx"
+GTF_INDEX_MAGIC = b"TPIDX\x00\x00\x00"
+GTF_INDEX_VERSION = 4
+
+# Defining GTF Index Range Record (byte position and length of a run of lines)
+GTF_INDEX_RANGE = struct.Struct("<QQ")
+
+# Defining Annotation Store Suffix, Magic Number and Format Version (see --convert)
+GTF_STORE_SUFFIX = ".tpstore"
+GTF_STORE_MAGIC = b"TPSTORE\x00"
+GTF_STORE_VERSION = 1
+
+# Defining gzip Magic Number (gzip and bgzip-compressed GTF files)
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Defining Output Formats, and Vector Formats (written once, whatever the requested dpis)
+OUTPUT_FORMATS = ("pdf", "png", "svg")
+VECTOR_FORMATS = ("pdf", "svg")
+
+# Defining GTF Feature Types Used for Plotting
+PLOTTED_FEATURES = ("exon", "CDS")
+
+# Defining transcript_id Attribute Pattern (used to filter lines before tokenizing)
+TRANSCRIPT_ID_RE = re.compile(r'(?:^|[;\t])\s*transcript_id\s+"?([^";\s]+)')
+GENE_ID_RE = re.compile(r'(?:^|[;\t])\s*gene_id\s+"?([^";\s]+)')
+
+# Defining Column Order of the --coordinates Output
+COORDINATE_COLUMNS = ("transcript_id", "gene_name", "feature", "number", "start", "end", "strand", "scaled_start", "scaled_end")
+
+# Defining File Names of the --profile Report
+PROFILE_REPORT_NAME = "Transcripts_Plots_Profile.jsonl"
+PROFILE_SUMMARY_NAME = "Transcripts_Plots_Profile_Summary.tsv"
+PROFILE_PSTATS_NAME = "Transcripts_Plots_Profile.pstats"
+
+# Defining Number of Transcripts Parsed Ahead of Rendering (see prefetch)
+PIPELINE_QUEUE_SIZE = 16
+
+# Defining Number of Columns and Maximum Tile Resolution (dpi) of --contact_sheet Sheets
+CONTACT_SHEET_COLUMNS = 4
+CONTACT_SHEET_MAX_DPI = 150
+
+# Defining Height (inches) of Each Track of a --stacked Figure
+STACKED_TRACK_HEIGHT = 0.75
+
+# Defining Content Types, Queue Depth and Queue Timeout (seconds) of the --serve Mode
+SERVE_CONTENT_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+SERVE_QUEUE_PER_JOB = 4
+SERVE_QUEUE_TIMEOUT = 30
+
+# Defining Largest Resolution (dpi) and Figure Size (inches) Accepted by the --serve Mode
+SERVE_MAX_DPI = 2000
+SERVE_MAX_FIGSIZE = 100
+
+# Defining Render Cache Format Version (part of every --cache key)
+RENDER_CACHE_VERSION = 2
+
+# Render Cache Key Salt of This Process (see render_cache_key)
+render_cache_salt = None
+
+# Defining File Name and Columns of the --resume Journal, and the Progress Report Interval (seconds)
+JOURNAL_NAME = "Transcripts_Plots_Journal.tsv"
+JOURNAL_COLUMNS = ("transcript_id", "feature", "format", "dpi", "file", "bytes")
+PROGRESS_INTERVAL = 10
+
+# Resume Journal of This Process (see journal_outputs)
+journal_out = None
+
+# Profile Report of This Process, and Records Made Before It Is Opened (see record_stage)
+profile_out = None
+profile_pending = []
+# Peak RSS of This Process Before the Last Reset of Its High-Water Mark (see reset_peak_rss)
+process_peak_rss = 0.0
+
+# Lazily Imported Modules (set by import_numpy and import_plotting_modules)
+np = plt = PdfPages = LineCollection = PolyCollection = None
+#-------------------------------------------------------------------------------
+
+#-------------------------------------------------------------------------------
+# Helper Functions
+#-------------------------------------------------------------------------------
+
+def check_dependencies():
+    """
+    Raise ImportError, with the command installing it, if a required module
+    is not installed. Modules are only located here (not imported), so that
+    startup stays fast.
+    """
+    import importlib.util
+    for module, install_cmd in required_modules.items():
+        if importlib.util.find_spec(module) is None:
+            raise ImportError(f"The '{module}' module is not installed.\nPlease install it using:\n    {install_cmd}\n")
+
+def import_numpy():
+    """
+    Import numpy on first use (it is needed to process features, but not to
+    start up, print the version or build indexes).
+    """
+    global np
+    if np is None:
+        import numpy as np
+
+def import_plotting_modules():
+    """
+    Import matplotlib (with the non-interactive Agg backend selected
+    explicitly) and numpy on first use. Runs that do not render plots,
+    such as --version, --build-index or --coordinates, never import them.
+    """
+    global plt, PdfPages, LineCollection, PolyCollection
+    if plt is not None:
+        return
+    import_numpy()
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.collections import LineCollection, PolyCollection
+
+def parse_attributes(attr_str):
+    """
+    Parse the attributes field from a GTF entry into a dictionary.
+    """
+    attrs = {}
+    for attr in attr_str.strip().split(";"):
+        if attr.strip():
+            key_value = attr.strip().split(" ", 1)
+            if len(key_value) == 2:
+                key = key_value[0]
+                value = key_value[1].replace('"','').strip()
+                attrs[key] = value
+    return attrs
+
+def parse_gtf(gtf_file, transcript_id):
+    """
+    Parse the provided GTF file and return the TranscriptEntries of the given
+    transcript_id (ignoring version suffix), or None if it is not found.
+    Only entries with exactly 9 columns are processed.
+    """
+    return parse_gtf_transcripts(gtf_file, [transcript_id]).get(transcript_id)
+
+def get_attribute(entries, key, default=None):
+    """
+    Return a single attribute value of a transcript (see TranscriptEntries).
+    Attributes are kept as the raw GTF string and only parsed on demand.
+    """
+    return parse_attributes(entries.attr_str).get(key, default)
+
+def gtf_line_transcript_id(line):
+    """
+    Extract the transcript_id (ignoring version suffix) from a raw GTF line
+    without tokenizing it. Return an empty string if there is none.
+    """
+    match = TRANSCRIPT_ID_RE.search(line)
+    return match.group(1).split('.')[0] if match else ''
+
+def gtf_line_gene_id(line):
+    """
+    Extract the complete gene_id (with any version and suffix, such as
+    GENCODE's _PAR_Y) from a raw GTF line without tokenizing it. Return an
+    empty string if there is none.
+    """
+    match = GENE_ID_RE.search(line)
+    return match.group(1) if match else ''
+
+class GTFFormatError(ValueError):
+    """
+    Raised when a GTF file (or annotation store) cannot be read as such;
+    main turns it into an error message and exit.
+    """
+
+def parse_gtf_line(line, gtf_file):
+    """
+    Parse a single GTF line into a (feature, start, end, strand, attr_str, chrom) tuple.
+    Return None for lines whose feature type is not plotted (see PLOTTED_FEATURES).
+    Raises GTFFormatError if the line does not have exactly 9 tab-delimited columns.
+    """
+    parts = line.strip().split("\t")
+    if len(parts) != 9:
+        raise GTFFormatError(f"The GTF file {gtf_file} does not have 9 tab-delimited fields.")
+    if parts[2] not in PLOTTED_FEATURES:
+        return None
+    return parts[2], int(parts[3]), int(parts[4]), parts[6], parts[8], parts[0]
+
+def add_gtf_row(found, transcript_id, row):
+    """
+    Add a row parsed by parse_gtf_line to the TranscriptEntries of
+    transcript_id in the found dict, creating them on the first row.
+    """
+    entries = found.get(transcript_id)
+    if entries is None:
+        entries = found[transcript_id] = TranscriptEntries(row[4], row[3], row[5])
+    entries.append(row[0], row[1], row[2])
+
+def parse_gtf_transcripts(gtf_file, transcript_ids):
+    """
+    Parse the provided GTF file once and return a dict mapping each requested
+    transcript_id (ignoring version suffix) to its TranscriptEntries.
+    Transcripts that are not found are absent from the returned dict.
+    If an up-to-date index (see build_gtf_index) exists, only the indexed
+    lines of the requested transcripts are read, and annotation stores (see
+    convert_gtf) are looked up without parsing at all.
+    Lines are only tokenized once their transcript_id matches, and only
+    exon and CDS entries are kept.
+    """
+    wanted = set(transcript_ids)
+    store = open_gtf_store(gtf_file)
+    if store is not None:
+        found = {}
+        for tid in wanted:
+            entries = store.get(tid)
+            if entries is not None:
+                found[tid] = entries
+        return found
+    index = load_gtf_index(gtf_file)
+    if index is not None:
+        return read_indexed_transcripts(gtf_file, index, wanted)
+    # With a single transcript, a plain substring test rejects almost every
+    # line before the regular expression is even run.
+    needle = next(iter(wanted)) if len(wanted) == 1 else None
+    found = {}
+    with open_gtf(gtf_file) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            if needle is not None and needle not in line:
+                continue
+            tid = gtf_line_transcript_id(line)
+            if tid not in wanted:
+                continue
+            row = parse_gtf_line(line, gtf_file)
+            if row is not None:
+                add_gtf_row(found, tid, row)
+    return found
+
+def stream_gtf_transcripts(gtf_file, gene=None, grouped=True):
+    """
+    Stream the GTF file once and yield (transcript_id, entries) tuples, one per
+    transcript, as soon as each transcript is complete. If gene is given, only
+    transcripts whose gene_id (ignoring version suffix) or gene_name matches it
+    are yielded.
+    With grouped=True (GTF lines grouped by gene, as in Ensembl/GENCODE files)
+    a transcript is complete when its gene block ends, so memory is bounded by
+    one gene's features. With grouped=False, transcripts are held until EOF.
+    Raises GTFFormatError if a grouped GTF turns out not to be grouped by gene.
+    Annotation stores (see convert_gtf) are read in GTF order either way.
+    """
+    store = open_gtf_store(gtf_file)
+    if store is not None:
+        yield from (store.transcripts() if gene is None else store.gene_transcripts(gene))
+        return
+    # The version-less prefix of a gene ID or name is always a substring of
+    # the matching lines, so it can reject lines before they are tokenized.
+    needle = gene.split('.')[0] if gene is not None else None
+    pending = {}
+    current_gene = None
+    closed_genes = set()
+    with open_gtf(gtf_file) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            if needle is not None and needle not in line:
+                continue
+            row = parse_gtf_line(line, gtf_file)
+            if row is None:
+                continue
+            tid = gtf_line_transcript_id(line)
+            if not tid:
+                continue
+            if gene is not None:
+                attrs = parse_attributes(row[4])
+                if (attrs.get('gene_id', '').split('.')[0] != needle
+                        and attrs.get('gene_name') != gene):
+                    continue
+            if grouped:
+                # Gene blocks are keyed by chromosome and complete gene_id, since
+                # GENCODE repeats pseudoautosomal gene IDs on chrY (with _PAR_Y).
+                gene_id = (line.split("\t", 1)[0], gtf_line_gene_id(line))
+                if gene_id != current_gene:
+                    if current_gene is not None:
+                        closed_genes.add(current_gene)
+                    if gene_id in closed_genes:
+                        raise GTFFormatError(f"The GTF file {gtf_file} is not grouped by gene (gene {gene_id[1]} reappears). Use --unsorted_gtf.")
+                    yield from pending.items()
+                    pending = {}
+                    current_gene = gene_id
+            add_gtf_row(pending, tid, row)
+    yield from pending.items()
+
+def process_features(entries):
+    """
+    Split the TranscriptEntries of a transcript into exons and CDS FeatureArrays.
+    Sort them by ascending genomic coordinate, then if the strand is '-',
+    reverse them so that the 5' end (highest coordinate) is first.
+    """
+    import_numpy()
+    arrays = []
+    for feature in PLOTTED_FEATURES:
+        start = np.array(entries.starts[feature], dtype=np.int64)
+        end = np.array(entries.ends[feature], dtype=np.int64)
+        # Always sort by ascending genomic coordinate (stable, as list.sort):
+        order = np.argsort(start, kind='stable')
+        # If minus strand, reverse the order so that the 5' feature comes first.
+        if entries.strand == '-':
+            order = order[::-1]
+        arrays.append(FeatureArray(feature, entries.strand, start[order], end[order]))
+    exons, cds = arrays
+    return exons, cds
+
+def compute_lengths(features):
+    """
+    Return the length of each feature of a FeatureArray (as an array).
+    """
+    return features.end - features.start
+
+def scale_coordinates(features, full_scale, fixed_intron=20):
+    """
+    Scale the genomic coordinates of a FeatureArray for plotting, always
+    left-to-right from 5' to 3', and return (scaled_start, scaled_end) arrays.
+    If full_scale is True, use real coordinates (shifted so the 5' feature starts at 0).
+    Otherwise, compress introns to a fixed gap.
+    """
+    # Because we reversed minus-strand features in process_features,
+    # features.start[0] is always the 5' feature.
+    if full_scale:
+        # FULL-SCALE MODE:
+        # Place the 5' feature at x=0, then map everything accordingly.
+        first_start = features.start[0]
+        if features.strand == '-':
+            # Minus-strand features are reversed, so the 5' feature has the highest coordinate.
+            return first_start - features.end, first_start - features.start
+        return features.start - first_start, features.end - first_start
+    # INTRON-COMPRESSED MODE:
+    # Chain the features from left to right, each one fixed_intron after the
+    # end of the previous one.
+    widths = compute_lengths(features)
+    scaled_start = np.zeros(len(widths), dtype=np.int64)
+    scaled_start[1:] = np.cumsum(widths[:-1]) + fixed_intron * np.arange(1, len(widths))
+    return scaled_start, scaled_start + widths
+
+def scale_shared_coordinates(features_list, full_scale, fixed_intron=20):
+    """
+    Scale several FeatureArrays (e.g., the isoforms of a gene) onto one shared
+    x-axis, left-to-right from 5' to 3', and return a list of
+    (scaled_start, scaled_end) tuples, one per FeatureArray.
+    If full_scale is True, use real coordinates (shifted so the most 5'
+    feature starts at 0). Otherwise, the union of all features is split into
+    blocks of overlapping features, and every gap between blocks (an intron
+    in all of them) is compressed to the same fixed gap.
+    If the strands differ, the plus-strand orientation is used.
+    """
+    reverse = {features.strand for features in features_list} == {'-'}
+    starts = np.concatenate([features.start for features in features_list])
+    ends = np.concatenate([features.end for features in features_list])
+    if full_scale:
+        if reverse:
+            origin = ends.max()
+            return [(origin - features.end, origin - features.start) for features in features_list]
+        origin = starts.min()
+        return [(features.start - origin, features.end - origin) for features in features_list]
+    # Merge the features (in genomic order) into blocks: a new block starts
+    # wherever a feature starts after every earlier feature has ended.
+    order = np.argsort(starts, kind='stable')
+    sorted_starts = starts[order]
+    sorted_ends = ends[order]
+    new_block = np.ones(len(sorted_starts), dtype=bool)
+    new_block[1:] = sorted_starts[1:] > np.maximum.accumulate(sorted_ends)[:-1]
+    first = np.flatnonzero(new_block)
+    block_start = sorted_starts[first]
+    block_end = np.maximum.reduceat(sorted_ends, first)
+    # Chain the blocks as scale_coordinates chains features.
+    widths = block_end - block_start
+    block_x = np.zeros(len(widths), dtype=np.int64)
+    block_x[1:] = np.cumsum(widths[:-1]) + fixed_intron * np.arange(1, len(widths))
+    total = block_x[-1] + widths[-1]
+    def to_x(positions):
+        block = np.searchsorted(block_start, positions, side='right') - 1
+        return block_x[block] + (positions - block_start[block])
+    scaled = []
+    for features in features_list:
+        scaled_start, scaled_end = to_x(features.start), to_x(features.end)
+        # Minus strand: mirror the axis so that the 5' end is on the left.
+        scaled.append((total - scaled_end, total - scaled_start) if reverse else (scaled_start, scaled_end))
+    return scaled
+
+def merge_pixel_features(scaled_start, scaled_end, units_per_pixel):
+    """
+    Level of detail for full-scale plots: merge consecutive scaled features
+    (in 5' to 3' order) that are less than one pixel column apart, together
+    with the intron between them, which would not be visible anyway.
+    Return the (start, end) arrays of the features to draw, so that at most
+    one feature is drawn per pixel column of the output.
+    """
+    gaps = scaled_start[1:] - scaled_end[:-1]
+    new_feature = np.ones(len(scaled_start), dtype=bool)
+    new_feature[1:] = gaps >= units_per_pixel
+    if new_feature.all():
+        return scaled_start, scaled_end
+    first = np.flatnonzero(new_feature)
+    return scaled_start[first], np.maximum.reduceat(scaled_end, first)
+
+def figure_width(x_min, x_max, args):
+    """
+    Return the figure width (inches): args.figsize[0], or with dynamic_resize
+    the width that matches the data range, capped at 20 inches.
+    """
+    if not args.dynamic_resize:
+        return args.figsize[0]
+    # Calculate the data width (with padding equivalent to the axis limits).
+    data_width = (x_max - x_min) + 20
+    # Define a conversion factor: in full_scale mode we assume 1000 data units per inch;
+    # in compressed mode we assume a 1:1 ratio.
+    conversion = 1000.0 if args.full_scale else 1.0
+    new_width_inches = data_width / conversion
+    # Ensure the new width is at least the original width and cap it to a maximum (e.g., 20 inches)
+    new_width_inches = max(new_width_inches, args.figsize[0])
+    return min(new_width_inches, 20)
+
+def units_per_pixel(ax, x_min, x_max, width, args):
+    """
+    Return the number of data units in one pixel column of the axis, for a
+    figure of the given width (inches) saved at the highest requested dpi.
+    """
+    pixels = width * ax.get_position().width * max(args.dpi)
+    return ((x_max - x_min) + 20) / pixels
+
+def parse_region(region):
+    """
+    Parse a region string of the form CHROM:START-END (1-based, inclusive;
+    thousands separators allowed) into a (chrom, start, end) tuple.
+    Return None if the string is not a valid region.
+    """
+    chrom, _, interval = region.rpartition(":")
+    start, _, end = interval.replace(",", "").partition("-")
+    if not chrom or not start.isdigit() or not end.isdigit() or int(start) > int(end):
+        return None
+    return chrom, int(start), int(end)
+
+def create_output_dir(base_name=None):
+    """
+    Create a new output directory.
+    If a base_name is provided and exists, a numeric suffix is appended (e.g., Test01).
+    Otherwise, a default name is used.
+    """
+    if base_name:
+        out_dir = base_name
+        suffix = 0
+        while os.path.exists(out_dir):
+            suffix += 1
+            out_dir = f"{base_name}_{suffix:02d}"
+    else:
+        suffix = 1
+        out_dir = f"Transcripts_Plots_dir_Run{suffix:02d}"
+        while os.path.exists(out_dir):
+            suffix += 1
+            out_dir = f"Transcripts_Plots_dir_Run{suffix:02d}"
+    os.makedirs(out_dir, exist_ok=True)
+    return out_dir
+
+#-------------------------------------------------------------------------------
+# Transcript Model Classes
+#-------------------------------------------------------------------------------
+
+class TranscriptEntries:
+    """
+    Exon and CDS rows of one transcript, as collected while parsing a GTF file:
+    lists of start and end coordinates per feature type (or array views, for
+    transcripts read from an annotation store). The strand, chromosome and
+    raw attribute string are stored once per transcript (from its first row).
+    """
+    __slots__ = ('attr_str', 'strand', 'chrom', 'starts', 'ends')
+
+    def __init__(self, attr_str, strand, chrom=None):
+        self.attr_str = attr_str
+        self.strand = strand
+        self.chrom = chrom
+        self.starts = {feature: [] for feature in PLOTTED_FEATURES}
+        self.ends = {feature: [] for feature in PLOTTED_FEATURES}
+
+    def append(self, feature, start, end):
+        self.starts[feature].append(start)
+        self.ends[feature].append(end)
+
+    def __len__(self):
+        return sum(len(starts) for starts in self.starts.values())
+
+class FeatureArray:
+    """
+    Features of one type (exon or CDS) of a transcript, ordered 5' to 3',
+    with their genomic start and end coordinates held in NumPy arrays.
+    """
+    __slots__ = ('feature', 'strand', 'start', 'end')
+
+    def __init__(self, feature, strand, start, end):
+        self.feature = feature
+        self.strand = strand
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return len(self.start)
+
+#-------------------------------------------------------------------------------
+# GTF Index Functions
+#-------------------------------------------------------------------------------
+
+def gtf_index_path(gtf_file):
+    """
+    Return the path of the sidecar index file for the given GTF file.
+    """
+    return f"{gtf_file}{GTF_INDEX_SUFFIX}"
+
+def build_gtf_index(gtf_file):
+    """
+    Scan the GTF file once and write a sidecar index mapping each transcript_id
+    (ignoring version suffix) to the byte ranges of its exon and CDS lines. The index records
+    the GTF size and modification time so that stale indexes can be detected.
+    For BGZF (bgzip) files the ranges start at BGZF virtual offsets, so that
+    lookups only inflate the compressed blocks they need.
+    The index file holds a JSON header, then one fixed-width record per
+    transcript (its ID, NUL-padded, and the first and number of its ranges),
+    sorted by ID so that GTFIndex can binary-search it, then the ranges.
+    Return the path of the index file.
+    """
+    compression = gtf_compression(gtf_file)
+    if compression == "gzip":
+        sys.exit(f"Error: The GTF file {gtf_file} is gzip-compressed but not BGZF; recompress it with bgzip to index it.")
+    transcripts = {}
+    range_ends = {}
+    offset = 0
+    with open(gtf_file, 'rb') as f:
+        for position, raw_line in gtf_raw_lines(f, compression):
+            line_length = len(raw_line)
+            line = raw_line.decode()
+            if not line.startswith("#"):
+                tid = gtf_line_transcript_id(line)
+                fields = line.split("\t", 3)
+                if tid and len(fields) > 2 and fields[2] in PLOTTED_FEATURES:
+                    ranges = transcripts.setdefault(tid, [])
+                    # Merge with the previous range when the lines are contiguous.
+                    if ranges and range_ends[tid] == offset:
+                        ranges[-1][1] += line_length
+                    else:
+                        ranges.append([position, line_length])
+                    range_ends[tid] = offset + line_length
+            offset += line_length
+    stat = os.stat(gtf_file)
+    ids = sorted((tid.encode(), tid) for tid in transcripts)
+    id_width = max((len(key) for key, _ in ids), default=1)
+    record = struct.Struct(f"<{id_width}sQQ")
+    header = json.dumps({
+        'version': GTF_INDEX_VERSION,
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'compression': compression,
+        'count': len(ids),
+        'id_width': id_width
+    }, separators=(',', ':')).encode()
+    index_file = gtf_index_path(gtf_file)
+    with open(index_file, 'wb') as f:
+        f.write(GTF_INDEX_MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        first = 0
+        for key, tid in ids:
+            f.write(record.pack(key, first, len(transcripts[tid])))
+            first += len(transcripts[tid])
+        for _, tid in ids:
+            for position, length in transcripts[tid]:
+                f.write(GTF_INDEX_RANGE.pack(position, length))
+    return index_file
+
+class GTFIndex:
+    """
+    Read-only view of a sidecar index written by build_gtf_index. The file is
+    memory-mapped, and a lookup binary-searches the sorted transcript records,
+    so it only reads the pages holding the records it compares and its ranges.
+    """
+    def __init__(self, index_file, header, header_end):
+        self.compression = header['compression']
+        self.count = header['count']
+        self.id_width = header['id_width']
+        self.record = struct.Struct(f"<{self.id_width}sQQ")
+        self.records_start = header_end
+        self.ranges_start = header_end + self.count * self.record.size
+        with open(index_file, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def ranges(self, transcript_id):
+        """
+        Return the (position, length) byte ranges of a transcript_id (ignoring
+        version suffix), or an empty list if it is not indexed.
+        """
+        key = transcript_id.encode()
+        if len(key) > self.id_width:
+            return []
+        # NUL padding keeps the padded IDs in the same order as the IDs.
+        key = key.ljust(self.id_width, b"\x00")
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = self.record.unpack_from(self.data, self.records_start + middle * self.record.size)
+            if record[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low == self.count:
+            return []
+        record_id, first, count = self.record.unpack_from(self.data, self.records_start + low * self.record.size)
+        if record_id != key:
+            return []
+        return [GTF_INDEX_RANGE.unpack_from(self.data, self.ranges_start + (first + number) * GTF_INDEX_RANGE.size)
+                for number in range(count)]
+
+def load_gtf_index(gtf_file):
+    """
+    Open the sidecar index for the given GTF file (see GTFIndex), reading
+    only its header.
+    Return None if there is no index, or if it is stale (the GTF size or
+    modification time changed since the index was built, or it was written
+    by an older version) or unreadable.
+    """
+    index_file = gtf_index_path(gtf_file)
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with open(index_file, 'rb') as f:
+            magic = f.read(len(GTF_INDEX_MAGIC))
+            if magic == GTF_INDEX_MAGIC:
+                header_length = int.from_bytes(f.read(8), "little")
+                header = json.loads(f.read(header_length))
+    except (OSError, ValueError):
+        print(f"Warning: Ignoring unreadable index {index_file}.")
+        return None
+    stat = os.stat(gtf_file)
+    if (magic != GTF_INDEX_MAGIC
+            or header.get('version') != GTF_INDEX_VERSION
+            or header.get('size') != stat.st_size
+            or header.get('mtime_ns') != stat.st_mtime_ns):
+        print(f"Warning: Ignoring stale index {index_file}. Rebuild it with --build-index.")
+        return None
+    return GTFIndex(index_file, header, len(GTF_INDEX_MAGIC) + 8 + header_length)
+
+def read_indexed_transcripts(gtf_file, index, transcript_ids):
+    """
+    Read only the lines of the requested transcripts, seeking straight to the
+    byte ranges recorded in the index. Return a dict mapping transcript_id to
+    its TranscriptEntries, as parse_gtf_transcripts does.
+    """
+    found = {}
+    with open(gtf_file, 'rb') as f:
+        for tid in transcript_ids:
+            for position, length in index.ranges(tid):
+                if index.compression == "bgzf":
+                    data = bgzf_read(f, position, length)
+                else:
+                    f.seek(position)
+                    data = f.read(length)
+                for line in data.decode().splitlines():
+                    row = parse_gtf_line(line, gtf_file)
+                    if row is not None:
+                        add_gtf_row(found, tid, row)
+    return found
+
+#-------------------------------------------------------------------------------
+# Annotation Store Functions
+#-------------------------------------------------------------------------------
+
+def gtf_store_path(gtf_file):
+    """
+    Return the path of the annotation store written by --convert for the
+    given GTF file.
+    """
+    return f"{gtf_file}{GTF_STORE_SUFFIX}"
+
+def is_gtf_store(gtf_file):
+    """
+    Return True if the file is an annotation store (see convert_gtf) rather
+    than a GTF file.
+    """
+    with open(gtf_file, 'rb') as f:
+        return f.read(len(GTF_STORE_MAGIC)) == GTF_STORE_MAGIC
+
+def string_table(strings):
+    """
+    Pack a list of strings into a string table: the concatenated UTF-8 bytes
+    and the offsets of each string (one more offset than strings).
+    """
+    encoded = [string.encode() for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(string) for string in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def convert_gtf(gtf_file):
+    """
+    Read the GTF file once and write its exon and CDS rows to an annotation
+    store next to it (see gtf_store_path), a single file of NumPy arrays:
+      start, end:                coordinates of every row, grouped by transcript
+                                 (exons first, then CDS, each in file order)
+      row_offset, cds_offset:    where the rows (and the CDS rows) of each
+                                 transcript begin
+      strand, chrom, gene:       per transcript (chrom and gene are indexes
+                                 into the chromosome list and gene tables)
+      span_start, span_end:      per transcript extent, for --region
+      transcript_ids, gene_ids,
+      gene_names:                string tables (bytes and offsets)
+      id_order:                  transcript indexes sorted by transcript_id
+    Arrays are 8-byte aligned after a JSON header, so that GTFStore can map
+    them from the file without copying. Return the path of the store.
+    """
+    import_numpy()
+    transcripts = {}
+    genes = {}
+    chroms = {}
+    rows = ([], [], [], [])
+    with open_gtf(gtf_file) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            row = parse_gtf_line(line, gtf_file)
+            if row is None:
+                continue
+            tid = gtf_line_transcript_id(line)
+            if not tid:
+                continue
+            index = transcripts.get(tid)
+            if index is None:
+                attrs = parse_attributes(row[4])
+                gene_id = attrs.get('gene_id', '')
+                if gene_id not in genes:
+                    genes[gene_id] = (len(genes), attrs.get('gene_name', ''))
+                chrom = line.split("\t", 1)[0]
+                index = transcripts[tid] = (len(transcripts), chroms.setdefault(chrom, len(chroms)),
+                                            genes[gene_id][0], row[3])
+            for column, value in zip(rows, (index[0], PLOTTED_FEATURES.index(row[0]), row[1], row[2])):
+                column.append(value)
+    if not transcripts:
+        sys.exit(f"Error: No exon or CDS entries with a transcript_id found in {gtf_file}.")
+
+    row_transcript, row_feature, start, end = (np.array(column, dtype=np.int64) for column in rows)
+    del rows
+    # Group the rows by transcript, exons before CDS, keeping the file order.
+    order = np.lexsort((row_feature, row_transcript))
+    row_transcript, row_feature, start, end = (row_transcript[order], row_feature[order],
+                                               start[order], end[order])
+    n_transcripts = len(transcripts)
+    row_offset = np.searchsorted(row_transcript, np.arange(n_transcripts + 1))
+    cds_offset = np.searchsorted(row_transcript * 2 + row_feature, np.arange(n_transcripts) * 2 + 1)
+    transcript_ids = list(transcripts)
+    arrays = {
+        'start': start,
+        'end': end,
+        'row_offset': row_offset.astype(np.int64),
+        'cds_offset': cds_offset.astype(np.int64),
+        'strand': np.array([ord(index[3][0]) for index in transcripts.values()], dtype=np.uint8),
+        'chrom': np.array([index[1] for index in transcripts.values()], dtype=np.int32),
+        'gene': np.array([index[2] for index in transcripts.values()], dtype=np.int32),
+        'span_start': np.minimum.reduceat(np.minimum(start, end), row_offset[:-1]),
+        'span_end': np.maximum.reduceat(np.maximum(start, end), row_offset[:-1]),
+        'id_order': np.array(sorted(range(n_transcripts), key=lambda i: transcript_ids[i].encode()),
+                             dtype=np.int64),
+    }
+    for name, strings in (('transcript_ids', transcript_ids),
+                          ('gene_ids', list(genes)),
+                          ('gene_names', [name for _, name in genes.values()])):
+        arrays[f"{name}_bytes"], arrays[f"{name}_offsets"] = string_table(strings)
+
+    # The header lists the dtype, length and offset (from the end of the
+    # header) of every array.
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [array.dtype.str, len(array), offset]
+        offset += -(-array.nbytes // 8) * 8
+    header = json.dumps({
+        'version': GTF_STORE_VERSION,
+        'source': os.path.basename(gtf_file),
+        'chroms': list(chroms),
+        'arrays': layout
+    }, separators=(',', ':')).encode()
+    header += b" " * (-(len(GTF_STORE_MAGIC) + 8 + len(header)) % 8)
+    store_file = gtf_store_path(gtf_file)
+    tmp_file = f"{store_file}.{os.getpid()}.tmp"
+    with open(tmp_file, 'wb') as out:
+        out.write(GTF_STORE_MAGIC)
+        out.write(len(header).to_bytes(8, "little"))
+        out.write(header)
+        for array in arrays.values():
+            out.write(array.tobytes())
+            out.write(b"\x00" * (-array.nbytes % 8))
+    os.replace(tmp_file, store_file)
+    return store_file
+
+class GTFStore:
+    """
+    Read-only view of an annotation store written by convert_gtf. The file is
+    memory-mapped, so opening it only reads the header, and the TranscriptEntries
+    it returns hold array views into the mapping: looking up a transcript costs
+    the same whatever the annotation size, and processes reading the same store
+    share one copy of it in the page cache.
+    """
+    def __init__(self, store_file):
+        import_numpy()
+        with open(store_file, 'rb') as f:
+            f.seek(len(GTF_STORE_MAGIC))
+            header_length = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_length))
+        if header.get('version') != GTF_STORE_VERSION:
+            raise GTFFormatError(f"The annotation store {store_file} has an unsupported format version; "
+                                 f"convert the GTF file again with --convert.")
+        self.store_file = store_file
+        self.chroms = header['chroms']
+        data = np.memmap(store_file, dtype=np.uint8, mode='r')
+        base = len(GTF_STORE_MAGIC) + 8 + header_length
+        for name, (dtype, length, offset) in header['arrays'].items():
+            dtype = np.dtype(dtype)
+            view = data[base + offset:base + offset + length * dtype.itemsize].view(dtype)
+            setattr(self, name, view)
+
+    def __len__(self):
+        return len(self.strand)
+
+    def string(self, table, index):
+        """
+        Return string number index of a string table (e.g., 'gene_names').
+        """
+        offsets = getattr(self, f"{table}_offsets")
+        return getattr(self, f"{table}_bytes")[offsets[index]:offsets[index + 1]].tobytes().decode()
+
+    def find(self, transcript_id):
+        """
+        Return the index of a transcript_id (ignoring version suffix) by binary
+        search in id_order, or None if it is not in the store.
+        """
+        key = transcript_id.encode()
+        offsets = self.transcript_ids_offsets
+        low, high = 0, len(self.id_order)
+        while low < high:
+            middle = (low + high) // 2
+            index = self.id_order[middle]
+            if self.transcript_ids_bytes[offsets[index]:offsets[index + 1]].tobytes() < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.id_order) and self.string('transcript_ids', self.id_order[low]) == transcript_id:
+            return int(self.id_order[low])
+        return None
+
+    def entries(self, index):
+        """
+        Return the TranscriptEntries of transcript number index. Its start and
+        end coordinates are views into the store, and its attribute string only
+        holds the gene_id, transcript_id and gene_name (if any).
+        """
+        gene = self.gene[index]
+        attr_str = f'gene_id "{self.string("gene_ids", gene)}"; transcript_id "{self.string("transcript_ids", index)}";'
+        gene_name = self.string('gene_names', gene)
+        if gene_name:
+            attr_str += f' gene_name "{gene_name}";'
+        entries = TranscriptEntries(attr_str, chr(self.strand[index]), self.chroms[self.chrom[index]])
+        first, cds, last = self.row_offset[index], self.cds_offset[index], self.row_offset[index + 1]
+        entries.starts = {'exon': self.start[first:cds], 'CDS': self.start[cds:last]}
+        entries.ends = {'exon': self.end[first:cds], 'CDS': self.end[cds:last]}
+        return entries
+
+    def get(self, transcript_id, default=None):
+        """
+        Return the TranscriptEntries of a transcript_id, or default if it is
+        not in the store (as dict.get, so that a store can stand in for a
+        parsed {transcript_id: entries} dict).
+        """
+        index = self.find(transcript_id)
+        return self.entries(index) if index is not None else default
+
+    def transcripts(self, indexes=None):
+        """
+        Yield (transcript_id, entries) tuples for the given transcript indexes
+        (all transcripts by default), in GTF order.
+        """
+        for index in (range(len(self)) if indexes is None else indexes):
+            yield self.string('transcript_ids', index), self.entries(index)
+
+    def gene_transcripts(self, gene):
+        """
+        Yield the (transcript_id, entries) tuples of every transcript whose
+        gene_id (ignoring version suffix) or gene_name matches gene.
+        """
+        needle = gene.split('.')[0]
+        genes = [index for index in range(len(self.gene_ids_offsets) - 1)
+                 if self.string('gene_ids', index).split('.')[0] == needle
+                 or self.string('gene_names', index) == gene]
+        yield from self.transcripts(np.flatnonzero(np.isin(self.gene, genes)))
+
+    def region_transcripts(self, chrom, start, end):
+        """
+        Return a dict mapping the transcript_id of every transcript overlapping
+        the 1-based, inclusive region chrom:start-end to its TranscriptEntries.
+        """
+        if chrom not in self.chroms:
+            return {}
+        overlapping = np.flatnonzero((self.chrom == self.chroms.index(chrom))
+                                     & (self.span_start <= end) & (self.span_end >= start))
+        return dict(self.transcripts(overlapping))
+
+def open_gtf_store(gtf_file):
+    """
+    Return a GTFStore for gtf_file if it is an annotation store, or None if
+    it is a GTF file.
+    """
+    return GTFStore(gtf_file) if is_gtf_store(gtf_file) else None
+
+#-------------------------------------------------------------------------------
+# Compressed GTF Functions
+#-------------------------------------------------------------------------------
+
+def gtf_compression(gtf_file):
+    """
+    Detect how a GTF file is stored from its first bytes.
+    Return "bgzf" for bgzip-compressed files, "gzip" for other gzip files,
+    and None for plain-text files.
+    """
+    with open(gtf_file, 'rb') as f:
+        header = f.read(18)
+    if header[:2] != GZIP_MAGIC:
+        return None
+    # BGZF blocks are gzip members with an extra field holding a 'BC' subfield.
+    if len(header) == 18 and header[3] & 4 and header[12:14] == b"BC":
+        return "bgzf"
+    return "gzip"
+
+def open_gtf(gtf_file):
+    """
+    Open a plain-text, gzip or bgzip-compressed GTF file for streaming
+    text reading.
+    """
+    if gtf_compression(gtf_file) is not None:
+        return gzip.open(gtf_file, 'rt')
+    return open(gtf_file, 'r')
+
+def bgzf_blocks(f, block_offset=0):
+    """
+    Yield (block_offset, data) tuples for each BGZF block of the open binary
+    file f, starting at the compressed block_offset, with data inflated.
+    """
+    f.seek(block_offset)
+    while True:
+        header = f.read(12)
+        if len(header) < 12:
+            return
+        xlen = struct.unpack("<H", header[10:12])[0]
+        extra = f.read(xlen)
+        # Find the BSIZE value (total block size minus 1) in the 'BC' subfield.
+        bsize = None
+        pos = 0
+        while pos + 4 <= xlen:
+            slen = struct.unpack("<H", extra[pos + 2:pos + 4])[0]
+            if extra[pos:pos + 2] == b"BC":
+                bsize = struct.unpack("<H", extra[pos + 4:pos + 6])[0]
+            pos += 4 + slen
+        if bsize is None:
+            raise ValueError(f"Invalid BGZF block at offset {block_offset}")
+        body = f.read(bsize - 11 - xlen)
+        yield block_offset, zlib.decompress(header + extra + body, 31)
+        block_offset += bsize + 1
+
+def bgzf_lines(f, virtual_offset=0):
+    """
+    Yield (virtual_offset, raw_line) tuples for each line of the open BGZF
+    file f, starting at the given BGZF virtual offset (compressed block
+    offset << 16 | offset within the inflated block).
+    """
+    within = virtual_offset & 0xFFFF
+    pending = b""
+    pending_offset = None
+    for block_offset, data in bgzf_blocks(f, virtual_offset >> 16):
+        pos, within = within, 0
+        while pos < len(data):
+            if pending_offset is None:
+                pending_offset = (block_offset << 16) | pos
+            newline = data.find(b"\n", pos)
+            if newline == -1:
+                pending += data[pos:]
+                break
+            yield pending_offset, pending + data[pos:newline + 1]
+            pending = b""
+            pending_offset = None
+            pos = newline + 1
+    if pending_offset is not None:
+        yield pending_offset, pending
+
+def bgzf_read(f, virtual_offset, length):
+    """
+    Read length inflated bytes from the open BGZF file f, starting at the
+    given BGZF virtual offset.
+    """
+    within = virtual_offset & 0xFFFF
+    chunks = []
+    remaining = length + within
+    for _, data in bgzf_blocks(f, virtual_offset >> 16):
+        chunks.append(data)
+        remaining -= len(data)
+        if remaining <= 0:
+            break
+    return b"".join(chunks)[within:within + length]
+
+def gtf_raw_lines(f, compression):
+    """
+    Yield (position, raw_line) tuples for each line of the open binary GTF
+    file f. Positions are byte offsets for plain files and BGZF virtual
+    offsets for bgzip-compressed files.
+    """
+    if compression == "bgzf":
+        yield from bgzf_lines(f)
+        return
+    offset = 0
+    for raw_line in f:
+        yield offset, raw_line
+        offset += len(raw_line)
+
+def load_tabix_index(gtf_file):
+    """
+    Load the tabix-style index (.tbi or .csi) of a bgzip-compressed GTF file.
+    Return a dict with the binning parameters ('min_shift', 'depth') and, for
+    each sequence name, its bins (bin -> list of chunk virtual offset pairs)
+    and linear index. Return None if there is no index.
+    """
+    for suffix in (".tbi", ".csi"):
+        index_file = gtf_file + suffix
+        if os.path.exists(index_file):
+            break
+    else:
+        return None
+    with gzip.open(index_file, 'rb') as f:
+        data = f.read()
+    magic = data[:4]
+    if magic == b"TBI\1":
+        min_shift, depth = 14, 5
+        n_ref, l_nm = struct.unpack_from("<i24xi", data, 4)
+        tabix_header = data[8:36 + l_nm]
+        pos = 36 + l_nm
+    elif magic == b"CSI\1":
+        min_shift, depth, l_aux = struct.unpack_from("<iii", data, 4)
+        tabix_header = data[16:16 + l_aux]
+        pos = 16 + l_aux
+        n_ref = struct.unpack_from("<i", data, pos)[0]
+        pos += 4
+    else:
+        sys.exit(f"Error: {index_file} is not a tabix (.tbi) or CSI (.csi) index.")
+    # The sequence names are stored after the 7 tabix header integers.
+    l_nm = struct.unpack_from("<i", tabix_header, 24)[0]
+    names = tabix_header[28:28 + l_nm].split(b"\0")[:n_ref]
+    refs = {}
+    for name in names:
+        bins = {}
+        n_bin = struct.unpack_from("<i", data, pos)[0]
+        pos += 4
+        for _ in range(n_bin):
+            bin_number = struct.unpack_from("<I", data, pos)[0]
+            pos += 4
+            if magic == b"CSI\1":
+                pos += 8  # Per-bin loffset; the linear filter is only applied for .tbi.
+            n_chunk = struct.unpack_from("<i", data, pos)[0]
+            pos += 4
+            bins[bin_number] = [struct.unpack_from("<QQ", data, pos + 16 * i) for i in range(n_chunk)]
+            pos += 16 * n_chunk
+        linear = []
+        if magic == b"TBI\1":
+            n_intv = struct.unpack_from("<i", data, pos)[0]
+            pos += 4
+            linear = list(struct.unpack_from(f"<{n_intv}Q", data, pos))
+            pos += 8 * n_intv
+        refs[name.decode()] = {'bins': bins, 'linear': linear}
+    return {'min_shift': min_shift, 'depth': depth, 'refs': refs}
+
+def region_to_bins(beg, end, min_shift, depth):
+    """
+    Return the list of bins that may hold features overlapping the 0-based,
+    half-open interval [beg, end), using the tabix/CSI binning scheme.
+    """
+    bins = []
+    end -= 1
+    shift = min_shift + depth * 3
+    offset = 0
+    for level in range(depth + 1):
+        bins.extend(range(offset + (beg >> shift), offset + (end >> shift) + 1))
+        shift -= 3
+        offset += 1 << (level * 3)
+    return bins
+
+def tabix_region_lines(gtf_file, tabix_index, chrom, start, end):
+    """
+    Yield the raw lines of a bgzip-compressed GTF file that overlap the
+    1-based, inclusive region chrom:start-end, inflating only the compressed
+    blocks listed by the tabix index.
+    """
+    ref = tabix_index['refs'].get(chrom)
+    if ref is None:
+        return
+    beg = max(start - 1, 0)
+    min_offset = 0
+    if ref['linear']:
+        min_offset = ref['linear'][min(beg >> 14, len(ref['linear']) - 1)]
+    chunks = sorted(
+        chunk
+        for bin_number in region_to_bins(beg, end, tabix_index['min_shift'], tabix_index['depth'])
+        for chunk in ref['bins'].get(bin_number, [])
+        if chunk[1] > min_offset
+    )
+    # Merge overlapping chunks so that no line is read twice.
+    merged = []
+    for chunk_beg, chunk_end in chunks:
+        if merged and chunk_beg <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], chunk_end)
+        else:
+            merged.append([chunk_beg, chunk_end])
+    with open(gtf_file, 'rb') as f:
+        for chunk_beg, chunk_end in merged:
+            for virtual_offset, raw_line in bgzf_lines(f, chunk_beg):
+                if virtual_offset >= chunk_end:
+                    break
+                line = raw_line.decode()
+                if line.startswith("#"):
+                    continue
+                fields = line.split("\t", 5)
+                if (len(fields) > 4 and fields[0] == chrom
+                        and int(fields[3]) <= end and int(fields[4]) >= start):
+                    yield line
+
+def region_lines(gtf_file, chrom, start, end):
+    """
+    Yield the raw lines of a GTF file that overlap the 1-based, inclusive
+    region chrom:start-end. A tabix/CSI index is used when available;
+    otherwise the whole file is streamed.
+    """
+    tabix_index = load_tabix_index(gtf_file) if gtf_compression(gtf_file) == "bgzf" else None
+    if tabix_index is not None:
+        yield from tabix_region_lines(gtf_file, tabix_index, chrom, start, end)
+        return
+    with open_gtf(gtf_file) as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            fields = line.split("\t", 5)
+            if (len(fields) > 4 and fields[0] == chrom
+                    and int(fields[3]) <= end and int(fields[4]) >= start):
+                yield line
+
+def parse_gtf_region(gtf_file, chrom, start, end):
+    """
+    Return a dict mapping the transcript_id (ignoring version suffix) of every
+    transcript overlapping the 1-based, inclusive region chrom:start-end to
+    its complete exon and CDS entries (as TranscriptEntries).
+    """
+    store = open_gtf_store(gtf_file)
+    if store is not None:
+        return store.region_transcripts(chrom, start, end)
+    # First find the transcripts overlapping the region and their full extent,
+    # then read that (possibly larger) extent to collect all of their features.
+    spans = {}
+    for line in region_lines(gtf_file, chrom, start, end):
+        tid = gtf_line_transcript_id(line)
+        if tid:
+            fields = line.split("\t", 5)
+            low, high = spans.get(tid, (int(fields[3]), int(fields[4])))
+            spans[tid] = (min(low, int(fields[3])), max(high, int(fields[4])))
+    if not spans:
+        return {}
+    found = {}
+    span_start = min(low for low, _ in spans.values())
+    span_end = max(high for _, high in spans.values())
+    for line in region_lines(gtf_file, chrom, span_start, span_end):
+        tid = gtf_line_transcript_id(line)
+        if tid in spans:
+            row = parse_gtf_line(line, gtf_file)
+            if row is not None:
+                add_gtf_row(found, tid, row)
+    return found
+
+#-------------------------------------------------------------------------------
+# Manifest Functions
+#-------------------------------------------------------------------------------
+
+def read_manifest(manifest_file):
+    """
+    Read a multi-transcript manifest (2 tab-delimited columns: transcript ID and
+    GTF path), from standard input if manifest_file is '-'. Return a list of
+    (line, transcript_id, gtf_file) tuples in file order; invalid lines are
+    kept with transcript_id and gtf_file set to None.
+    """
+    records = []
+    with (open(manifest_file) if manifest_file != "-" else sys.stdin) as f:
+        for line in f:
+            parts = line.strip().split("\t")
+            if len(parts) != 2:
+                records.append((line, None, None))
+                continue
+            transcript_id, gtf_file = parts
+            records.append((line, transcript_id.split('.')[0], gtf_file))
+    return records
+
+def parse_manifest_gtf(gtf_file, transcript_ids, args):
+    """
+    Parse one GTF file of a manifest for all of its requested transcript IDs.
+    Return the {transcript_id: entries} dict produced by parse_gtf_transcripts,
+    or None if the GTF file is missing or empty.
+    """
+    if not os.path.exists(gtf_file) or os.path.getsize(gtf_file) == 0:
+        return None
+    start = stage_start(args)
+    parsed = parse_gtf_transcripts(gtf_file, transcript_ids)
+    record_stage(args, "parse", start, gtf=gtf_file)
+    return parsed
+
+def manifest_transcripts(records, args):
+    """
+    Yield (transcript_id, entries) tuples for the manifest records, in manifest
+    order, printing a message for every record that has to be skipped.
+    Records are grouped by GTF path so that each GTF is parsed exactly once,
+    when its first record is reached, and released after its last record.
+    """
+    grouped = {}
+    last_record = {}
+    for number, (_, transcript_id, gtf_file) in enumerate(records):
+        if transcript_id is None:
+            continue
+        grouped.setdefault(gtf_file, set()).add(transcript_id)
+        last_record[gtf_file] = number
+    parsed_gtfs = {}
+    for number, (line, transcript_id, gtf_file) in enumerate(records):
+        if transcript_id is None:
+            print(f"Skipping invalid line: {line.strip()}")
+            continue
+        if gtf_file not in parsed_gtfs:
+            parsed_gtfs[gtf_file] = parse_manifest_gtf(gtf_file, grouped[gtf_file], args)
+        parsed = parsed_gtfs[gtf_file]
+        if number == last_record[gtf_file]:
+            del parsed_gtfs[gtf_file]
+        if parsed is None:
+            print(f"GTF file {gtf_file} for transcript {transcript_id} does not exist or is empty. Skipping.")
+            continue
+        entries = parsed.get(transcript_id)
+        if not entries:
+            print(f"Transcript {transcript_id} not found in {gtf_file}. Skipping.")
+            continue
+        yield transcript_id, entries
+
+#-------------------------------------------------------------------------------
+# Plotting Functions
+#-------------------------------------------------------------------------------
+
+def plot_transcript(features, args, transcript_id, gene_name, plot_feature="exons"):
+    """
+    Plot the transcript structure for the given features (either exons or CDS),
+    always left-to-right from 5' to 3'. At the end, if dynamic_resize is enabled,
+    the figure width is adjusted based on the data range so that extra whitespace is minimized.
+    """
+    import_plotting_modules()
+
+    # 1) Scale coordinates (5' end at x=0).
+    scaled_start, scaled_end = scale_coordinates(features, args.full_scale)
+
+    # 2) Compute transcript size and prepare transcript label text.
+    transcript_size = (features.end.max() - features.start.min()) / 1000.0
+    num_features = len(features)
+    if plot_feature.lower() == "exons":
+        info_text = f"{gene_name} ({transcript_id} [{transcript_size:.1f} kbp - {num_features}-exons])"
+    else:
+        info_text = f"{gene_name} ({transcript_id} [{transcript_size:.1f} kbp - {num_features}-CDS])"
+
+    # 3) Set uniform rectangle parameters (for both exons and CDS)
+    rect_y = 0.5
+    #### rect_y = 0.75
+    rect_height = 0.3
+    #### rect_height = 0.5
+
+    # 4) Create figure and axis using the provided figsize
+    fig, ax = plt.subplots(figsize=args.figsize)
+    #### plt.subplots_adjust(left=0.08, right=0.98, top=0.90, bottom=0.12)
+    plt.subplots_adjust(left=0.08, right=0.98, top=0.60, bottom=0.12)
+
+    # 5) Conditionally place the transcript label (if not suppressed)
+    if args.print_transcript_label:
+        trans_label_x = scaled_start[0]
+        #### trans_label_y = rect_y + rect_height + 0.15
+        trans_label_y = rect_y + rect_height + 0.40
+        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=10, weight="bold")
+        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=18, weight="bold")
+        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize, weight="bold")
+        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize if hasattr(args, 'transcript_fontsize') else 18, weight="bold")
+        ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize, weight="bold")
+
+    # 6) Choose color based on feature type.
+    color = args.exon_color if plot_feature.lower() == "exons" else args.CDS_color
+
+    # 7) Draw all features as rectangles in a single collection (one artist,
+    #    however many features), and label only first and last features if requested.
+    #    The rectangle corners are built directly from the coordinate arrays.
+    #    In full-scale mode, features less than one pixel column apart are
+    #    merged first (level of detail), so the number of drawn features is
+    #    bounded by the output width, whatever the number of features.
+    x_min = int(scaled_start.min())
+    x_max = int(scaled_end.max())
+    drawn_start, drawn_end = scaled_start, scaled_end
+    if args.full_scale and num_features > 1:
+        pixel = units_per_pixel(ax, x_min, x_max, figure_width(x_min, x_max, args), args)
+        drawn_start, drawn_end = merge_pixel_features(scaled_start, scaled_end, pixel)
+    boxes = np.empty((len(drawn_start), 4, 2))
+    boxes[:, [0, 3], 0] = drawn_start[:, None]
+    boxes[:, [1, 2], 0] = drawn_end[:, None]
+    boxes[:, [0, 1], 1] = rect_y
+    boxes[:, [2, 3], 1] = rect_y + rect_height
+    ax.add_collection(PolyCollection(boxes, facecolor=color, edgecolor='black'), autolim=False)
+    # Label only the first and last feature if --labels is set to "full".
+    if args.labels == "full":
+        for i in sorted({0, num_features - 1}):
+            x = scaled_start[i]
+            width = scaled_end[i] - x
+            if plot_feature.lower() == "exons":
+                label = "E01" if i == 0 else f"E{num_features:02d}"
+            else:
+                label = "CE01" if i == 0 else f"CE{num_features:02d}"
+            #### ax.text(x + width/2, rect_y + rect_height + 0.05, label, ha='center', va='bottom', fontsize=8, color="black")
+            ax.text(x + width/2, rect_y + rect_height + 0.05, label, ha='center', va='bottom', fontsize=10, color="black")
+
+
+    # 8) Draw dashed lines (intron lines) between consecutive features,
+    #    again as a single collection.
+    y_line = rect_y + rect_height/2
+    introns = np.empty((len(drawn_start) - 1, 2, 2))
+    introns[:, 0, 0] = drawn_end[:-1]
+    introns[:, 1, 0] = drawn_start[1:]
+    introns[:, :, 1] = y_line
+    #### ax.plot([x0, x1], [y_line, y_line], linestyle='dashed', color='gray')
+    # Custom dash pattern: (offset, (dash_length, gap_length))
+    # Custom dash pattern for shorter dashes.
+    ax.add_collection(LineCollection(introns, linestyle=(0, (1, 1)), color='gray', zorder=2), autolim=False)
+
+    # 9) Set x-axis limits based on the data range (with a small padding).
+    ax.set_xlim(x_min - 10, x_max + 10)
+    ax.set_ylim(0, 2)
+
+    # 10) Dynamic resizing: adjust the figure width based on the x-range of the drawn content.
+    if args.dynamic_resize:
+        fig.set_size_inches(figure_width(x_min, x_max, args), args.figsize[1])
+
+    ax.axis('off')
+    return fig
+
+def plot_stacked_transcripts(tracks, args, title, plot_feature="exons"):
+    """
+    Plot several transcripts (a list of (transcript_id, features) tuples, with
+    features either exons or CDS) as stacked tracks of one figure, top to
+    bottom in the given order, on a shared x-axis (see scale_shared_coordinates).
+    The transcripts are expected to lie on one chromosome and strand (see
+    save_stacked_plots).
+    The figure height grows with the number of tracks; dynamic_resize
+    adjusts its width as in plot_transcript.
+    """
+    import_plotting_modules()
+    scaled = scale_shared_coordinates([features for _, features in tracks], args.full_scale)
+    num_tracks = len(tracks)
+    color = args.exon_color if plot_feature.lower() == "exons" else args.CDS_color
+    suffix = "exons" if plot_feature.lower() == "exons" else "CDS"
+    track_fontsize = max(8, round(args.transcript_fontsize * 0.6))
+
+    fig, ax = plt.subplots(figsize=(args.figsize[0], STACKED_TRACK_HEIGHT * num_tracks + 1))
+    x_min = int(min(scaled_start.min() for scaled_start, _ in scaled))
+    x_max = int(max(scaled_end.max() for _, scaled_end in scaled))
+    pixel = units_per_pixel(ax, x_min, x_max, figure_width(x_min, x_max, args), args) if args.full_scale else None
+    # Each track occupies one y unit, the first track at the top.
+    boxes = []
+    introns = []
+    for row, ((transcript_id, features), (scaled_start, scaled_end)) in enumerate(zip(tracks, scaled)):
+        base = num_tracks - 1 - row
+        num_features = len(features)
+        # Draw in ascending x, so that intron lines join neighboring boxes and
+        # the level of detail (as in plot_transcript) sees the real gaps.
+        order = np.argsort(scaled_start, kind='stable')
+        drawn_start, drawn_end = scaled_start[order], scaled_end[order]
+        if pixel is not None and num_features > 1:
+            drawn_start, drawn_end = merge_pixel_features(drawn_start, drawn_end, pixel)
+        track_boxes = np.empty((len(drawn_start), 4, 2))
+        track_boxes[:, [0, 3], 0] = drawn_start[:, None]
+        track_boxes[:, [1, 2], 0] = drawn_end[:, None]
+        track_boxes[:, [0, 1], 1] = base + 0.15
+        track_boxes[:, [2, 3], 1] = base + 0.45
+        boxes.append(track_boxes)
+        # Intron lines join consecutive features.
+        track_introns = np.empty((len(drawn_start) - 1, 2, 2))
+        track_introns[:, 0, 0] = drawn_end[:-1]
+        track_introns[:, 1, 0] = drawn_start[1:]
+        track_introns[:, :, 1] = base + 0.30
+        introns.append(track_introns)
+        if args.print_transcript_label:
+            ax.text(scaled_start.min(), base + 0.55, f"{transcript_id} [{num_features}-{suffix}]",
+                    ha="left", va="bottom", fontsize=track_fontsize)
+        if args.labels == "full":
+            prefix = "E" if plot_feature.lower() == "exons" else "CE"
+            for i in sorted({0, num_features - 1}):
+                ax.text((scaled_start[i] + scaled_end[i]) / 2, base + 0.12, f"{prefix}{i + 1:02d}",
+                        ha='center', va='top', fontsize=8, color="black")
+    ax.add_collection(PolyCollection(np.concatenate(boxes), facecolor=color, edgecolor='black'), autolim=False)
+    ax.add_collection(LineCollection(np.concatenate(introns), linestyle=(0, (1, 1)), color='gray', zorder=2), autolim=False)
+
+    if args.print_transcript_label:
+        span = (max(features.end.max() for _, features in tracks) - min(features.start.min() for _, features in tracks)) / 1000.0
+        ax.text(x_min, num_tracks + 0.15, f"{title} ({num_tracks} transcripts [{span:.1f} kbp])",
+                ha="left", va="bottom", fontsize=args.transcript_fontsize, weight="bold")
+    ax.set_xlim(x_min - 10, x_max + 10)
+    ax.set_ylim(0, num_tracks + 0.6)
+
+    if args.dynamic_resize:
+        fig.set_size_inches(figure_width(x_min, x_max, args), fig.get_size_inches()[1])
+
+    ax.axis('off')
+    return fig
+
+#-------------------------------------------------------------------------------
+# Profiling Functions
+#-------------------------------------------------------------------------------
+
+def peak_rss_mb():
+    """
+    Return the peak resident set size of this process so far (its high-water
+    mark since it started, not the peak of the current stage), in MiB.
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    # ru_maxrss is also reset by reset_peak_rss, and can lag behind VmHWM.
+    return max(peak, process_peak_rss, stage_peak_rss_mb() or 0.0)
+
+def stage_peak_rss_mb():
+    """
+    Return the peak resident set size of this process since the last
+    reset_peak_rss (VmHWM), in MiB, or None where it is not available (it is
+    read from /proc, on Linux).
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        return None
+    return None
+
+def reset_peak_rss():
+    """
+    Reset the RSS high-water mark of this process to its current RSS (on
+    Linux, by writing 5 to /proc/self/clear_refs), after keeping the peak so
+    far in process_peak_rss.
+    """
+    global process_peak_rss
+    process_peak_rss = peak_rss_mb()
+    try:
+        with open("/proc/self/clear_refs", 'w') as f:
+            f.write("5")
+    except OSError:
+        pass
+
+def stage_start(args):
+    """
+    Return the start time of a stage for record_stage (a time.perf_counter
+    value). With --profile, the RSS high-water mark is reset first, so that
+    the stage records its own peak RSS.
+    """
+    if args.profile:
+        reset_peak_rss()
+    return time.perf_counter()
+
+def current_rss_mb():
+    """
+    Return the current resident set size of this process, in MiB, or None
+    where it is not available (it is read from /proc, on Linux).
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+def record_stage(args, stage, start, transcript_id=None, **fields):
+    """
+    With --profile, append one JSON-lines record to the profile report with
+    the wall time of a stage (since start, see stage_start), and the peak RSS
+    of the current process during the stage, its RSS at the end of the stage
+    and its peak RSS so far. The RSS is process-wide: it includes the work of
+    other threads (such as background parsing) during the stage. Records made
+    before the report is opened (see open_profile_report) are held in
+    profile_pending. Each record is written with a single call, so worker
+    processes can share the report.
+    """
+    global profile_out
+    if not args.profile:
+        return
+    seconds = time.perf_counter() - start
+    peak = stage_peak_rss_mb()
+    rss = current_rss_mb()
+    record = {
+        'transcript_id': transcript_id,
+        'stage': stage,
+        'seconds': round(seconds, 6),
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        'rss_mb': round(rss, 1) if rss is not None else None,
+        'process_peak_rss_mb': round(peak_rss_mb(), 1),
+        'pid': os.getpid(),
+    }
+    record.update(fields)
+    if args.profile_report is None:
+        profile_pending.append(record)
+        return
+    if profile_out is None:
+        profile_out = open(args.profile_report, 'a', buffering=1)
+    profile_out.write(json.dumps(record) + "\n")
+
+def open_profile_report(args, out_dir):
+    """
+    Open the --profile report in out_dir and write the pending records.
+    """
+    global profile_out
+    args.profile_report = os.path.join(out_dir, PROFILE_REPORT_NAME)
+    profile_out = open(args.profile_report, 'a', buffering=1)
+    for record in profile_pending:
+        profile_out.write(json.dumps(record) + "\n")
+    profile_pending.clear()
+
+def profile_transcripts(transcripts, args):
+    """
+    Yield the (transcript_id, entries) tuples of a streamed transcripts
+    iterable, recording the time spent reading each one as its parse stage.
+    """
+    start = stage_start(args)
+    for transcript_id, entries in transcripts:
+        record_stage(args, "parse", start, transcript_id)
+        yield transcript_id, entries
+        start = stage_start(args)
+
+def write_profile_summary(args, out_dir, run_seconds):
+    """
+    Aggregate the --profile report by stage, print the summary table and
+    write it to out_dir as a TSV file. Stage times are summed over all
+    processes, so with --jobs they can add up to more than the run time.
+    peak_rss_mb is the largest peak RSS reached during the stage, and
+    process_peak_mb the largest process high-water mark seen by then (which
+    may have been reached in an earlier stage).
+    """
+    global profile_out
+    if profile_out is not None:
+        profile_out.close()
+        profile_out = None
+    stages = {}
+    with open(args.profile_report) as f:
+        for line in f:
+            record = json.loads(line)
+            stage = stages.setdefault(record['stage'], {'calls': 0, 'total': 0.0, 'max': 0.0,
+                                                        'peak_rss_mb': None, 'process_peak_mb': 0.0})
+            stage['calls'] += 1
+            stage['total'] += record['seconds']
+            stage['max'] = max(stage['max'], record['seconds'])
+            if record['peak_rss_mb'] is not None:
+                stage['peak_rss_mb'] = max(stage['peak_rss_mb'] or 0.0, record['peak_rss_mb'])
+            stage['process_peak_mb'] = max(stage['process_peak_mb'], record['process_peak_rss_mb'])
+    stage_total = sum(stage['total'] for stage in stages.values()) or 1.0
+    rows = [("stage", "calls", "total_s", "mean_ms", "max_ms", "share_pct", "peak_rss_mb", "process_peak_mb")]
+    for name, stage in stages.items():
+        peak_rss = f"{stage['peak_rss_mb']:.1f}" if stage['peak_rss_mb'] is not None else "NA"
+        rows.append((name, str(stage['calls']), f"{stage['total']:.3f}",
+                      f"{1000 * stage['total'] / stage['calls']:.2f}", f"{1000 * stage['max']:.2f}",
+                      f"{100 * stage['total'] / stage_total:.1f}", peak_rss, f"{stage['process_peak_mb']:.1f}"))
+    with open(os.path.join(out_dir, PROFILE_SUMMARY_NAME), 'w') as out:
+        out.writelines("\t".join(row) + "\n" for row in rows)
+    print(f"Profile ({run_seconds:.2f} s wall time, report: {args.profile_report}):")
+    for row in rows:
+        print(f"{row[0]:<18}" + "".join(f"{value:>16}" for value in row[1:]))
+
+#-------------------------------------------------------------------------------
+# Render Cache Functions
+#-------------------------------------------------------------------------------
+
+def plot_option_values(args):
+    """
+    Return the options that change how a figure looks (not which figures are
+    made, nor their format), as a JSON-serializable dict.
+    """
+    return {
+        'exon_color': args.exon_color,
+        'CDS_color': args.CDS_color,
+        'full_scale': args.full_scale,
+        'print_transcript_label': args.print_transcript_label,
+        'labels': args.labels,
+        'figsize': args.figsize,
+        'dynamic_resize': args.dynamic_resize,
+        'transcript_fontsize': args.transcript_fontsize,
+    }
+
+def render_cache_key(transcript_id, gene_name, features, plot_feature, args):
+    """
+    Return the hex digest identifying one figure in the render cache: a hash
+    of the features, the label text and every option that affects the figure,
+    salted with the script and matplotlib versions.
+    """
+    global render_cache_salt
+    if render_cache_salt is None:
+        import importlib.metadata
+        render_cache_salt = f"{RENDER_CACHE_VERSION}:{script_version}:{importlib.metadata.version('matplotlib')}"
+    options = {
+        'transcript_id': transcript_id,
+        'gene_name': gene_name,
+        'plot_feature': plot_feature,
+        'strand': features.strand,
+        # Full-scale plots are simplified for the highest dpi (see merge_pixel_features).
+        'lod_dpi': max(args.dpi) if args.full_scale else None,
+    }
+    options.update(plot_option_values(args))
+    digest = hashlib.sha256(render_cache_salt.encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    digest.update(features.start.tobytes())
+    digest.update(features.end.tobytes())
+    return digest.hexdigest()
+
+def render_cache_path(cache_dir, figure_key, fmt, dpi):
+    """
+    Return the path of one output (format and dpi) of a figure in the render
+    cache. Entries are spread over 256 subdirectories.
+    """
+    key = hashlib.sha256(f"{figure_key}:{fmt}:{dpi}".encode()).hexdigest()
+    return os.path.join(cache_dir, key[:2], f"{key}.{fmt}")
+
+def link_or_copy(src, dst):
+    """
+    Hard-link src to dst, or copy it if they are on different file systems
+    (or hard links are not supported). dst is written under a temporary name
+    and renamed over any existing file, so it is never written in place
+    (an existing dst may be a hard link to a cache entry).
+    """
+    tmp_path = f"{dst}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        os.link(src, tmp_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+def fetch_cached_output(cache_dir, figure_key, out_path, fmt, dpi):
+    """
+    Link (or copy) a cached output to out_path, marking it as recently used.
+    Return False if the output is not in the cache.
+    """
+    cache_path = render_cache_path(cache_dir, figure_key, fmt, dpi)
+    try:
+        link_or_copy(cache_path, out_path)
+    except FileNotFoundError:
+        return False
+    os.utime(cache_path)
+    return True
+
+def store_cached_output(cache_dir, figure_key, out_path, fmt, dpi):
+    """
+    Add a freshly written output file to the render cache. The output is
+    copied (not linked), so that later changes to it never reach the cache,
+    under a temporary name that is then renamed, so concurrent workers never
+    see a partial file.
+    """
+    cache_path = render_cache_path(cache_dir, figure_key, fmt, dpi)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    shutil.copyfile(out_path, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+def prune_render_cache(cache_dir, max_mb):
+    """
+    Remove the least recently used render cache entries until the cache
+    holds at most max_mb MiB. Return the number of entries removed.
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+    removed = 0
+    max_bytes = max_mb * 1024 * 1024
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+        removed += 1
+    return removed
+
+#-------------------------------------------------------------------------------
+# Resume Functions
+#-------------------------------------------------------------------------------
+
+def output_directory(args):
+    """
+    Return the output directory of the run: the --resume directory (created
+    if needed), or a new directory (see create_output_dir).
+    """
+    if args.resume:
+        os.makedirs(args.resume, exist_ok=True)
+        return args.resume
+    return create_output_dir(args.output) if args.output else create_output_dir()
+
+def open_journal(args, out_dir):
+    """
+    Open the --resume journal of out_dir for appending, creating it if needed,
+    and return a dict mapping the file name of every output completed by
+    earlier runs to its size. The first line of the journal records the
+    plotting options; exits if they differ from those of the current run.
+    """
+    global journal_out
+    args.journal_path = os.path.join(out_dir, JOURNAL_NAME)
+    options = json.dumps(plot_option_values(args), sort_keys=True)
+    completed = {}
+    if os.path.exists(args.journal_path):
+        with open(args.journal_path) as f:
+            header = f.readline().rstrip("\n")
+            if header != f"#options\t{options}":
+                sys.exit(f"Error: The output directory {out_dir} was started with different plotting options; use a new directory.")
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                # A line cut short by an interrupted run is ignored.
+                if len(parts) == len(JOURNAL_COLUMNS) and parts[-1].isdigit():
+                    completed[parts[-2]] = int(parts[-1])
+        journal_out = open(args.journal_path, 'a', buffering=1)
+    else:
+        journal_out = open(args.journal_path, 'a', buffering=1)
+        journal_out.write(f"#options\t{options}\n")
+    return completed
+
+def journal_outputs(args, transcript_id, plot_feature, targets):
+    """
+    With --resume, append one journal line per completed output file. Each
+    line is written with a single call, once the file has been fully written,
+    so worker processes can share the journal.
+    """
+    global journal_out
+    if not args.resume:
+        return
+    if journal_out is None:
+        journal_out = open(args.journal_path, 'a', buffering=1)
+    for out_path, fmt, dpi in targets:
+        row = (transcript_id, plot_feature, fmt, str(dpi), os.path.basename(out_path), str(os.path.getsize(out_path)))
+        journal_out.write("\t".join(row) + "\n")
+
+def output_completed(out_path, completed):
+    """
+    Return True if out_path was completed by an earlier run: journaled in
+    completed (see open_journal), and still of the journaled size.
+    """
+    size = completed.get(os.path.basename(out_path))
+    return size is not None and os.path.exists(out_path) and os.path.getsize(out_path) == size
+
+def completed_outputs(transcript_id, entries, args, out_dir, completed):
+    """
+    Return a (done, count) tuple for one transcript: done maps the file name
+    of each of its output files completed by an earlier run to its size, and
+    count is the number of its output files.
+    """
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    done = {}
+    count = 0
+    for plot_feature, gtf_feature in zip(("exons", "CDS"), PLOTTED_FEATURES):
+        if args.select not in (plot_feature, "both") or len(entries.starts[gtf_feature]) == 0:
+            continue
+        out_base = os.path.join(out_dir, f"{transcript_id}_{plot_feature}_{introns_status}")
+        for out_path, _, _ in output_targets(out_base, args.format, args.dpi):
+            if output_completed(out_path, completed):
+                name = os.path.basename(out_path)
+                done[name] = completed[name]
+            count += 1
+    return done, count
+
+class ProgressReport:
+    """
+    Progress of a --resume run: counts the transcripts rendered and skipped,
+    and prints the throughput (and, if the total is known, an ETA) at most
+    every PROGRESS_INTERVAL seconds.
+    """
+    def __init__(self, total):
+        self.total = total
+        self.rendered = 0
+        self.skipped = 0
+        self.previous_outputs = 0
+        self.start = time.perf_counter()
+        self.last_report = self.start
+
+    def update(self, rendered=0, skipped=0):
+        self.rendered += rendered
+        self.skipped += skipped
+        now = time.perf_counter()
+        if now - self.last_report >= PROGRESS_INTERVAL:
+            self.last_report = now
+            print(self.summary(now))
+
+    def summary(self, now, final=False):
+        done = self.rendered + self.skipped
+        rate = self.rendered / (now - self.start)
+        if final:
+            return (f"Rendered {self.rendered:,} transcripts in {now - self.start:.1f} s ({rate:.1f} transcripts/s); "
+                    f"{self.skipped:,} done by earlier runs.")
+        text = f"Progress: {done:,}" + (f"/{self.total:,}" if self.total else "") + \
+               f" transcripts ({self.skipped:,} done by earlier runs), {rate:.1f} transcripts/s"
+        if self.total and rate > 0:
+            eta = round((self.total - done) / rate)
+            text += f", ETA {eta // 3600:d}:{eta // 60 % 60:02d}:{eta % 60:02d}"
+        return text
+
+def resume_pending(transcripts, args, out_dir, completed, progress):
+    """
+    Yield a (transcript_id, entries, done) tuple for every transcript whose
+    outputs were not all completed by earlier runs, where done maps the file
+    names of its completed outputs to their sizes (see completed_outputs).
+    Transcripts completed by earlier runs are skipped, and counted with their
+    output files in progress.
+    """
+    for transcript_id, entries in transcripts:
+        done, count = completed_outputs(transcript_id, entries, args, out_dir, completed)
+        if len(done) < count:
+            yield transcript_id, entries, done
+        else:
+            progress.previous_outputs += count
+            progress.update(skipped=1)
+
+#-------------------------------------------------------------------------------
+# Rendering Functions
+#-------------------------------------------------------------------------------
+
+def init_render_worker():
+    """
+    Initialize a rendering worker process: import the plotting modules,
+    with the non-interactive Agg backend, once per worker.
+    """
+    import_plotting_modules()
+
+def start_render_pool(jobs):
+    """
+    Start a process pool of jobs rendering workers and wait until every
+    worker is running. Workers are forked when the pool starts, so starting
+    them before any background thread (such as the parsing thread of
+    prefetch) keeps locks held by that thread out of the workers.
+    """
+    # Imported on first use, like the plotting modules, to keep startup fast.
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=jobs, initializer=init_render_worker)
+    for future in [executor.submit(int) for _ in range(jobs)]:
+        future.result()
+    return executor
+
+def output_targets(out_base, formats, dpis):
+    """
+    Return the list of (out_path, format, dpi) tuples to write for one figure.
+    Vector formats (pdf, svg) are written once, at the first dpi. Raster
+    formats are written at every dpi; when several dpis are requested, the
+    dpi is appended to the file name (e.g., _72dpi).
+    """
+    targets = []
+    for fmt in formats:
+        if fmt in VECTOR_FORMATS or len(dpis) == 1:
+            targets.append((f"{out_base}.{fmt}", fmt, dpis[0]))
+        else:
+            targets.extend((f"{out_base}_{dpi}dpi.{fmt}", fmt, dpi) for dpi in dpis)
+    return targets
+
+def save_figure(fig, targets):
+    """
+    Save a figure to every (out_path, format, dpi) target (see output_targets).
+    The tight bounding box is computed once and reused for every output,
+    instead of being recomputed (with a full draw) by each savefig call.
+    Return the number of files written.
+    """
+    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight')
+    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.1)
+    if len(targets) == 1:
+        out_path, fmt, dpi = targets[0]
+        fig.savefig(out_path, format=fmt, dpi=dpi, bbox_inches='tight', pad_inches=0.05)
+        return 1
+    # Text extents depend slightly on the resolution, so the tight bounding
+    # box is computed once per dpi (not once per output file).
+    bboxes = {}
+    figure_dpi = fig.dpi
+    for out_path, fmt, dpi in targets:
+        if dpi not in bboxes:
+            fig.dpi = dpi
+            bboxes[dpi] = fig.get_tightbbox(fig.canvas.get_renderer()).padded(0.05)
+            fig.dpi = figure_dpi
+        fig.savefig(out_path, format=fmt, dpi=dpi, bbox_inches=bboxes[dpi])
+    return len(targets)
 
-# Defining_Script_Current_Version (date '+DATE:%Y/%m/%d%tTIME:%R')
-current_version_date = "DATE:2025/04/24"
-#-------------------------------------------------------------------------------
+def selected_features(exons, cds, args):
+    """
+    Yield (plot_feature, features) tuples for the selected, non-empty
+    features (exons and/or CDS) of one transcript.
+    """
+    for plot_feature, features in (("exons", exons), ("CDS", cds)):
+        if args.select in (plot_feature, "both") and features:
+            yield plot_feature, features
 
-#-------------------------------------------------------------------------------
-# Helper Functions
-#-------------------------------------------------------------------------------
+def transcript_figures(transcript_id, gene_name, exons, cds, args):
+    """
+    Yield (plot_feature, fig) tuples for the selected features (exons and/or
+    CDS) of one transcript. The caller is responsible for closing each figure.
+    """
+    for plot_feature, features in selected_features(exons, cds, args):
+        start = stage_start(args)
+        fig = plot_transcript(features, args, transcript_id, gene_name, plot_feature=plot_feature)
+        record_stage(args, "plot_transcript", start, transcript_id, feature=plot_feature)
+        yield plot_feature, fig
 
-def parse_attributes(attr_str):
+def save_transcript_plots(transcript_id, gene_name, exons, cds, args, out_dir, completed=None):
     """
-    Parse the attributes field from a GTF entry into a dictionary.
+    Plot and save the selected features (exons and/or CDS) of one transcript
+    into out_dir, once per requested format and dpi. File names reflect the
+    intron display mode. Outputs completed by earlier --resume runs (listed
+    in completed, see output_completed) are kept. With args.cache, outputs
+    found in the render cache are linked into out_dir. A figure is only
+    plotted if some of its outputs remain.
+    Return the number of output files created or kept.
     """
-    attrs = {}
-    for attr in attr_str.strip().split(";"):
-        if attr.strip():
-            key_value = attr.strip().split(" ", 1)
-            if len(key_value) == 2:
-                key = key_value[0]
-                value = key_value[1].replace('"','').strip()
-                attrs[key] = value
-    return attrs
+    # Determine intron display status for file naming:
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    output_files_created = 0
+    for plot_feature, features in selected_features(exons, cds, args):
+        out_base = os.path.join(out_dir, f"{transcript_id}_{plot_feature}_{introns_status}")
+        targets = output_targets(out_base, args.format, args.dpi)
+        if completed:
+            remaining = [target for target in targets if not output_completed(target[0], completed)]
+            output_files_created += len(targets) - len(remaining)
+            targets = remaining
+            if not targets:
+                continue
+        if args.cache:
+            start = stage_start(args)
+            figure_key = render_cache_key(transcript_id, gene_name, features, plot_feature, args)
+            cached = [target for target in targets if fetch_cached_output(args.cache, figure_key, *target)]
+            record_stage(args, "cache", start, transcript_id, feature=plot_feature, hits=len(cached))
+            journal_outputs(args, transcript_id, plot_feature, cached)
+            output_files_created += len(cached)
+            targets = [target for target in targets if target not in cached]
+            if not targets:
+                continue
+        start = stage_start(args)
+        fig = plot_transcript(features, args, transcript_id, gene_name, plot_feature=plot_feature)
+        record_stage(args, "plot_transcript", start, transcript_id, feature=plot_feature)
+        start = stage_start(args)
+        # Existing outputs (partial files, or hard links to render cache
+        # entries) are removed rather than overwritten in place.
+        for out_path, _, _ in targets:
+            if os.path.lexists(out_path):
+                os.remove(out_path)
+        output_files_created += save_figure(fig, targets)
+        plt.close(fig)
+        record_stage(args, "savefig", start, transcript_id, feature=plot_feature)
+        journal_outputs(args, transcript_id, plot_feature, targets)
+        if args.cache:
+            for target in targets:
+                store_cached_output(args.cache, figure_key, *target)
+    return output_files_created
 
-def parse_gtf(gtf_file, transcript_id):
+def figure_bytes(features, args, transcript_id, gene_name, plot_feature, fmt, dpi):
     """
-    Parse the provided GTF file and return a list of entries (as dicts)
-    that match the given transcript_id (ignoring version suffix).
-    Only entries with exactly 9 columns are processed.
+    Plot the given features (exons or CDS) of one transcript and return the
+    figure encoded in the given format and dpi, saved to memory.
     """
-    entries = []
-    with open(gtf_file, 'r') as f:
-        for line in f:
-            if line.startswith("#"):
+    import_plotting_modules()
+    fig = plot_transcript(features, args, transcript_id, gene_name, plot_feature=plot_feature)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight', pad_inches=0.05)
+    plt.close(fig)
+    return buffer.getvalue()
+
+def save_stacked_plots(transcripts, args, out_dir):
+    """
+    Plot every (transcript_id, entries) tuple as a track of a stacked figure
+    per selected feature (exons and/or CDS), and save it into out_dir.
+    Transcripts on different chromosomes or strands cannot share an axis, so
+    one figure is made per chromosome and strand, in order of first
+    appearance; the file names then end with the chromosome and strand
+    (e.g., _11_plus). The file name starts with the gene name if all
+    transcripts of the figure share one.
+    Return the number of output files created.
+    """
+    groups = {}
+    for transcript_id, entries in transcripts:
+        groups.setdefault((entries.chrom, entries.strand), []).append(
+            prepare_transcript(transcript_id, entries, args))
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    output_files_created = 0
+    for (chrom, strand), prepared in groups.items():
+        gene_names = {gene_name for _, gene_name, _, _ in prepared}
+        title = gene_names.pop() if len(gene_names) == 1 else "Transcripts"
+        group_suffix = ""
+        if len(groups) > 1:
+            group_suffix = f"_{chrom}_{'minus' if strand == '-' else 'plus'}"
+        for plot_feature in ("exons", "CDS"):
+            if args.select not in (plot_feature, "both"):
                 continue
-            parts = line.strip().split("\t")
-            if len(parts) != 9:
-                sys.exit(f"Error: The GTF file {gtf_file} does not have 9 tab-delimited fields.")
-            attr_dict = parse_attributes(parts[8])
-            tid = attr_dict.get('transcript_id', '').split('.')[0]
-            if tid != transcript_id:
+            tracks = [(transcript_id, exons if plot_feature == "exons" else cds)
+                      for transcript_id, _, exons, cds in prepared]
+            tracks = [(transcript_id, features) for transcript_id, features in tracks if features]
+            if not tracks:
                 continue
-            entry = {
-                'feature': parts[2],
-                'start': int(parts[3]),
-                'end': int(parts[4]),
-                'strand': parts[6],
-                'attributes': attr_dict
-            }
-            entries.append(entry)
-    return entries
+            start = stage_start(args)
+            fig = plot_stacked_transcripts(tracks, args, title, plot_feature=plot_feature)
+            record_stage(args, "plot_transcript", start, feature=plot_feature, tracks=len(tracks))
+            start = stage_start(args)
+            out_base = os.path.join(out_dir, f"{title.replace(os.sep, '_')}_{plot_feature}_Stacked_{introns_status}{group_suffix}")
+            output_files_created += save_figure(fig, output_targets(out_base, args.format, args.dpi))
+            plt.close(fig)
+            record_stage(args, "savefig", start, feature=plot_feature)
+    return output_files_created
 
-def process_features(entries):
+def save_pdf_pages(transcripts, args, out_dir):
     """
-    Filter entries to only include exons and CDS.
-    Sort them by ascending genomic coordinate, then if the strand is '-',
-    reverse them so that the 5' end (highest coordinate) is first in the list.
+    Stream the figures of every (transcript_id, entries) tuple into a single
+    multi-page PDF file, closing each figure as soon as its page is written.
+    Return the number of pages written.
     """
-    exons = [e for e in entries if e['feature'] == 'exon']
-    cds   = [e for e in entries if e['feature'] == 'CDS']
+    import_plotting_modules()
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    out_path = os.path.join(out_dir, f"Transcripts_Plots_{introns_status}.pdf")
+    pages = 0
+    with PdfPages(out_path) as pdf:
+        for transcript_id, entries in transcripts:
+            for plot_feature, fig in transcript_figures(*prepare_transcript(transcript_id, entries, args), args):
+                start = stage_start(args)
+                pdf.savefig(fig, bbox_inches='tight', pad_inches=0.05)
+                plt.close(fig)
+                record_stage(args, "savefig", start, transcript_id, feature=plot_feature)
+                pages += 1
+    return pages
 
-    # Always sort by ascending genomic coordinate:
-    exons.sort(key=lambda x: x['start'])
-    cds.sort(key=lambda x: x['start'])
+def write_contact_sheet(tiles, out_path, dpi):
+    """
+    Lay out the given RGBA image arrays (uint8) in a grid of up to
+    CONTACT_SHEET_COLUMNS columns, row by row, each tile at the top left of
+    its cell on a white canvas, and write the result as a PNG file.
+    """
+    import_plotting_modules()
+    columns = min(len(tiles), CONTACT_SHEET_COLUMNS)
+    rows = -(-len(tiles) // columns)
+    cell_height = max(tile.shape[0] for tile in tiles)
+    cell_width = max(tile.shape[1] for tile in tiles)
+    canvas = np.full((rows * cell_height, columns * cell_width, 4), 255, dtype=np.uint8)
+    for number, tile in enumerate(tiles):
+        top = (number // columns) * cell_height
+        left = (number % columns) * cell_width
+        canvas[top:top + tile.shape[0], left:left + tile.shape[1]] = tile
+    plt.imsave(out_path, canvas, dpi=dpi)
 
-    # Determine the strand (check exons first, else cds)
-    strand = None
-    if exons:
-        strand = exons[0]['strand']
-    elif cds:
-        strand = cds[0]['strand']
-    else:
-        strand = '+'  # default if no features found
+def figure_tile(fig, dpi):
+    """
+    Render a figure at the given dpi and return it as an RGBA image array
+    (uint8, a quarter of the memory of matplotlib's float images).
+    """
+    # Pillow is a dependency of matplotlib.
+    from PIL import Image
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches='tight', pad_inches=0.05)
+    buffer.seek(0)
+    with Image.open(buffer) as image:
+        return np.asarray(image.convert("RGBA"))
 
-    # If minus strand, reverse the lists so that the 5' feature is exons[0] or cds[0]
-    if strand == '-':
-        exons.reverse()
-        cds.reverse()
+def save_contact_sheets(transcripts, args, out_dir):
+    """
+    Render the figures of every (transcript_id, entries) tuple and tile them,
+    args.contact_sheet figures per canvas, into numbered contact-sheet PNG
+    files (at the first requested dpi, up to CONTACT_SHEET_MAX_DPI). Only one
+    canvas worth of images is held in memory at a time.
+    Return the number of contact sheets written.
+    """
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    dpi = min(args.dpi[0], CONTACT_SHEET_MAX_DPI)
+    sheets = 0
+    tiles = []
+    for transcript_id, entries in transcripts:
+        for plot_feature, fig in transcript_figures(*prepare_transcript(transcript_id, entries, args), args):
+            start = stage_start(args)
+            tiles.append(figure_tile(fig, dpi))
+            plt.close(fig)
+            record_stage(args, "savefig", start, transcript_id, feature=plot_feature)
+            if len(tiles) == args.contact_sheet:
+                sheets += 1
+                write_contact_sheet(tiles, os.path.join(out_dir, f"Transcripts_Plots_{introns_status}_Sheet{sheets:02d}.png"), dpi)
+                tiles = []
+    if tiles:
+        sheets += 1
+        write_contact_sheet(tiles, os.path.join(out_dir, f"Transcripts_Plots_{introns_status}_Sheet{sheets:02d}.png"), dpi)
+    return sheets
 
-    return exons, cds
+def coordinate_records(transcript_id, gene_name, exons, cds, args):
+    """
+    Yield one dict per selected feature of one transcript, with its genomic
+    and scaled (plotting) coordinates, numbered 5' to 3'.
+    """
+    for plot_feature, features in selected_features(exons, cds, args):
+        scaled_start, scaled_end = scale_coordinates(features, args.full_scale)
+        rows = zip(features.start.tolist(), features.end.tolist(), scaled_start.tolist(), scaled_end.tolist())
+        for number, (start, end, s_start, s_end) in enumerate(rows, start=1):
+            yield {
+                'transcript_id': transcript_id,
+                'gene_name': gene_name,
+                'feature': features.feature,
+                'number': number,
+                'start': start,
+                'end': end,
+                'strand': features.strand,
+                'scaled_start': s_start,
+                'scaled_end': s_end
+            }
 
-def compute_lengths(features):
+def write_coordinates(transcripts, args, out_dir):
     """
-    Compute the length of each feature and attach it.
+    Write the scaled feature coordinates of every (transcript_id, entries)
+    tuple to a TSV or JSON file (args.coordinates), without importing
+    matplotlib. The file is streamed, one transcript at a time, and only
+    created once there is something to write.
+    Return the number of files written (0 or 1).
     """
-    for f in features:
-        f['length'] = f['end'] - f['start']
-    return features
+    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
+    out_path = os.path.join(out_dir, f"Transcripts_Plots_Coordinates_{introns_status}.{args.coordinates}")
+    out = None
+    try:
+        for transcript_id, entries in transcripts:
+            for record in coordinate_records(*prepare_transcript(transcript_id, entries, args), args):
+                if out is None:
+                    out = open(out_path, 'w')
+                    if args.coordinates == "tsv":
+                        out.write("\t".join(COORDINATE_COLUMNS) + "\n")
+                    else:
+                        out.write("[\n")
+                elif args.coordinates == "json":
+                    out.write(",\n")
+                if args.coordinates == "tsv":
+                    out.write("\t".join(str(record[column]) for column in COORDINATE_COLUMNS) + "\n")
+                else:
+                    out.write(json.dumps(record))
+        if out is None:
+            return 0
+        if args.coordinates == "json":
+            out.write("\n]\n")
+        return 1
+    finally:
+        # Also closed (flushing what was written) on a malformed GTF file.
+        if out is not None:
+            out.close()
 
-def scale_coordinates(features, full_scale, fixed_intron=20):
+def prepare_transcript(transcript_id, entries, args):
     """
-    Scale genomic coordinates for plotting.
-    If full_scale is True, use real coordinates (shifted so the first feature starts at 0).
-    Otherwise, compress introns to a fixed gap.
+    Turn the parsed entries of one transcript into the
+    (transcript_id, gene_name, exons, cds) tuple used for rendering.
     """
-    scaled = []
-    current_pos = 0
-    prev_end = None
-    for f in features:
-        if full_scale:
-            scaled_start = f['start'] - features[0]['start']
-            scaled_end   = f['end'] - features[0]['start']
-        else:
-            if prev_end is None:
-                scaled_start = 0
-            else:
-                scaled_start = current_pos + fixed_intron
-            width = f['end'] - f['start']
-            scaled_end = scaled_start + width
-            current_pos = scaled_end
-        new_feat = f.copy()
-        new_feat['scaled_start'] = scaled_start
-        new_feat['scaled_end'] = scaled_end
-        scaled.append(new_feat)
-        prev_end = f['end']
-    return scaled
+    start = stage_start(args)
+    gene_name = get_attribute(entries, 'gene_name', transcript_id)
+    exons, cds = process_features(entries)
+    record_stage(args, "process_features", start, transcript_id)
+    return transcript_id, gene_name, exons, cds
 
-def create_output_dir(base_name=None):
+def prefetch(iterable, depth=PIPELINE_QUEUE_SIZE):
     """
-    Create a new output directory.
-    If a base_name is provided and exists, a numeric suffix is appended (e.g., Test01).
-    Otherwise, a default name is used.
+    Consume iterable in a background thread, at most depth items ahead of the
+    caller, and yield its items in order: reading and parsing GTF files then
+    overlaps with rendering and writing the figures. Exceptions raised while
+    producing items (such as the GTFFormatError of a malformed GTF file) are
+    re-raised in the caller.
     """
-    if base_name:
-        out_dir = base_name
-        suffix = 0
-        while os.path.exists(out_dir):
-            suffix += 1
-            out_dir = f"{base_name}_{suffix:02d}"
+    items = queue.Queue(maxsize=depth)
+    done = object()
+    def produce():
+        try:
+            for item in iterable:
+                items.put((item, None))
+        except BaseException as error:
+            items.put((done, error))
+            return
+        items.put((done, None))
+    # A daemon thread, so that an error in the caller does not leave the
+    # process waiting for a producer blocked on a full queue.
+    threading.Thread(target=produce, daemon=True).start()
+    while True:
+        item, error = items.get()
+        if item is done:
+            if error is not None:
+                raise error
+            return
+        yield item
+
+def render_transcripts(transcripts, args, out_dir, total=None):
+    """
+    Plot and save every (transcript_id, entries) tuple from the transcripts
+    iterable, consuming it lazily. With args.jobs > 1, rendering runs in a
+    process pool with a bounded number of transcripts in flight; results
+    are still collected in input order. With args.pdf_pages,
+    args.contact_sheet or args.stacked, all figures go to combined output
+    files instead; with args.coordinates, only the scaled coordinates are
+    written. With args.resume, outputs completed by earlier runs are kept
+    (transcripts with all of them completed are skipped), and progress is
+    reported (with an ETA if the total number of transcripts is given).
+    Return the number of output files (or pages) created, including those
+    completed by earlier runs.
+    """
+    if args.profile:
+        open_profile_report(args, out_dir)
+
+    # Coordinates only: no figures are made, so matplotlib is never imported.
+    if args.coordinates:
+        return write_coordinates(transcripts, args, out_dir)
+
+    # Combined outputs (one multi-page PDF, contact sheets, or stacked
+    # figures) are written from this process as figures are produced.
+    if args.pdf_pages:
+        return save_pdf_pages(transcripts, args, out_dir)
+    if args.contact_sheet:
+        return save_contact_sheets(transcripts, args, out_dir)
+    if args.stacked:
+        return save_stacked_plots(transcripts, args, out_dir)
+
+    output_files_created = 0
+    progress = None
+    if args.resume:
+        progress = ProgressReport(total)
+        transcripts = resume_pending(transcripts, args, out_dir, open_journal(args, out_dir), progress)
     else:
-        suffix = 1
-        out_dir = f"Transcripts_Plots_dir_Run{suffix:02d}"
-        while os.path.exists(out_dir):
-            suffix += 1
-            out_dir = f"Transcripts_Plots_dir_Run{suffix:02d}"
-    os.makedirs(out_dir, exist_ok=True)
-    return out_dir
+        transcripts = ((transcript_id, entries, None) for transcript_id, entries in transcripts)
+
+    if args.jobs == 1:
+        for transcript_id, entries, completed in transcripts:
+            output_files_created += save_transcript_plots(*prepare_transcript(transcript_id, entries, args), args, out_dir, completed)
+            if progress is not None:
+                progress.update(rendered=1)
+    else:
+        # Rendering and encoding dominate the run time; farm them out to a
+        # process pool, keeping at most a few transcripts per worker queued.
+        max_in_flight = 2 * args.jobs
+        in_flight = deque()
+        with start_render_pool(args.jobs) as executor:
+            for transcript_id, entries, completed in transcripts:
+                in_flight.append(executor.submit(save_transcript_plots, *prepare_transcript(transcript_id, entries, args), args, out_dir, completed))
+                if len(in_flight) >= max_in_flight:
+                    output_files_created += in_flight.popleft().result()
+                    if progress is not None:
+                        progress.update(rendered=1)
+            while in_flight:
+                output_files_created += in_flight.popleft().result()
+                if progress is not None:
+                    progress.update(rendered=1)
+
+    if progress is not None:
+        print(progress.summary(time.perf_counter(), final=True))
+        output_files_created += progress.previous_outputs
+    return output_files_created
 
 #-------------------------------------------------------------------------------
-# Plotting Function
+# Library Functions
 #-------------------------------------------------------------------------------
 
-def plot_transcript(features, args, transcript_id, gene_name, plot_feature="exons"):
+def plot_transcripts(gtf_file, transcript_ids, *, select="exons", format="png", dpi=300,
+                     exon_color="#305c96", CDS_color="#b38d1b", full_scale=False,
+                     transcript_label=True, labels="none", figsize=(10, 8),
+                     dynamic_resize=False, transcript_fontsize=18):
     """
-    Plot the transcript structure for the given features (either exons or CDS),
-    always left-to-right from 5' to 3'. At the end, if dynamic_resize is enabled,
-    the figure width is adjusted based on the data range so that extra whitespace is minimized.
+    Plot transcripts from a GTF file without writing any file, for use from
+    other Python code:
+        import Transcripts_Plots
+        for transcript_id, feature_type, data in Transcripts_Plots.plot_transcripts(
+                "genes.gtf", ["ENST00000380152"], select="both", format="svg"):
+            ...
+    transcript_ids is a transcript ID or an iterable of them (version suffixes
+    are ignored). The GTF file is parsed once. Yield one
+    (transcript_id, feature_type, bytes) tuple per figure, in the order of
+    transcript_ids, with feature_type "exons" or "CDS". Transcripts not found
+    in the GTF file are skipped. The keyword arguments match the command-line
+    options (transcript_label=False is --no_transcript_label).
+    Raises ValueError on an invalid option and ImportError if matplotlib is
+    not installed (when called, not when iterated), and GTFFormatError
+    (a ValueError) on a malformed GTF file (when iterated).
     """
-    # 1) Determine strand and scale coordinates
-    #    Because we reversed minus-strand features in process_features,
-    #    features[0] is always the 5' end.
-    strand = features[0]['strand'] if features else '+'
-    scaled_features = []
-    if args.full_scale:
-        # FULL-SCALE MODE:
-        # We want to place features[0] at x=0, then map everything accordingly.
-        first_start = features[0]['start']
-        for f in features:
-            # For plus strand, do: scaled_start = f['start'] - first_start
-            # For minus strand, do: scaled_start = first_start - f['end']
-            # but we can unify it if we rely on the fact that the list is in 5'→3' order.
-            if strand == '+':
-                s_start = f['start'] - first_start
-                s_end   = f['end']   - first_start
-            else:
-                # minus-strand features are reversed, so features[0] is the highest coordinate
-                s_start = first_start - f['end']
-                s_end   = first_start - f['start']
-            new_f = f.copy()
-            new_f['scaled_start'] = s_start
-            new_f['scaled_end']   = s_end
-            scaled_features.append(new_f)
-    else:
-        # INTRON-COMPRESSED MODE:
-        # We'll do a simple linear chaining from left to right.
-        current_pos = 0
-        for i, f in enumerate(features):
-            new_f = f.copy()
-            width = f['end'] - f['start']
-            if i == 0:
-                s_start = 0
-                s_end   = width
-                current_pos = s_end
-            else:
-                s_start = current_pos + 20  # 20 is the fixed intron gap.
-                s_end   = s_start + width
-                current_pos = s_end
-            new_f['scaled_start'] = s_start
-            new_f['scaled_end']   = s_end
-            scaled_features.append(new_f)
+    if select not in ("exons", "CDS", "both"):
+        raise ValueError(f"select must be 'exons', 'CDS' or 'both', not {select!r}")
+    if format not in OUTPUT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(OUTPUT_FORMATS)}, not {format!r}")
+    if labels not in ("none", "full"):
+        raise ValueError(f"labels must be 'none' or 'full', not {labels!r}")
+    check_dependencies()
+    if isinstance(transcript_ids, str):
+        transcript_ids = [transcript_ids]
+    transcript_ids = [transcript_id.split('.')[0] for transcript_id in transcript_ids]
+    args = argparse.Namespace(
+        select=select,
+        exon_color=exon_color,
+        CDS_color=CDS_color,
+        full_scale=full_scale,
+        print_transcript_label=transcript_label,
+        labels=labels,
+        figsize=list(figsize),
+        dynamic_resize=dynamic_resize,
+        transcript_fontsize=transcript_fontsize,
+        dpi=[dpi],
+        profile=False,
+        profile_report=None
+    )
+    return transcript_plot_bytes(gtf_file, transcript_ids, args, format, dpi)
 
-    # 2) Compute transcript size and prepare transcript label text.
-    transcript_size = (max(f['end'] for f in features) - min(f['start'] for f in features)) / 1000.0
-    num_features = len(features)
-    if plot_feature.lower() == "exons":
-        info_text = f"{gene_name} ({transcript_id} [{transcript_size:.1f} kbp - {num_features}-exons])"
-    else:
-        info_text = f"{gene_name} ({transcript_id} [{transcript_size:.1f} kbp - {num_features}-CDS])"
+def transcript_plot_bytes(gtf_file, transcript_ids, args, fmt, dpi):
+    """
+    Parse the GTF file once and yield the (transcript_id, feature_type, bytes)
+    tuples of plot_transcripts.
+    """
+    found = parse_gtf_transcripts(gtf_file, transcript_ids)
+    for transcript_id in transcript_ids:
+        entries = found.get(transcript_id)
+        if not entries:
+            continue
+        _, gene_name, exons, cds = prepare_transcript(transcript_id, entries, args)
+        for plot_feature, features in selected_features(exons, cds, args):
+            yield transcript_id, plot_feature, figure_bytes(features, args, transcript_id, gene_name,
+                                                            plot_feature, fmt, dpi)
 
-    # 3) Set uniform rectangle parameters (for both exons and CDS)
-    rect_y = 0.5
-    #### rect_y = 0.75
-    rect_height = 0.3
-    #### rect_height = 0.5
+#-------------------------------------------------------------------------------
+# Server Functions
+#-------------------------------------------------------------------------------
 
-    # 4) Create figure and axis using the provided figsize
-    fig, ax = plt.subplots(figsize=args.figsize)
-    #### plt.subplots_adjust(left=0.08, right=0.98, top=0.90, bottom=0.12)
-    plt.subplots_adjust(left=0.08, right=0.98, top=0.60, bottom=0.12)
+class ParsedGTFCache:
+    """
+    Thread-safe LRU cache of fully parsed GTF files for --serve, each held as
+    a {transcript_id: entries} dict (annotation stores are held as their
+    memory-mapped GTFStore instead). An entry is reparsed if its file has
+    changed (size or modification time) since it was parsed.
+    """
+    def __init__(self, max_gtfs):
+        self.max_gtfs = max_gtfs
+        self.gtfs = OrderedDict()
+        self.lock = threading.Lock()
+        self.file_locks = {}
 
-    # 5) Conditionally place the transcript label (if not suppressed)
-    if args.print_transcript_label:
-        first_feat = scaled_features[0]
-        trans_label_x = first_feat['scaled_start']
-        #### trans_label_y = rect_y + rect_height + 0.15
-        trans_label_y = rect_y + rect_height + 0.40
-        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=10, weight="bold")
-        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=18, weight="bold")
-        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize, weight="bold")
-        #### ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize if hasattr(args, 'transcript_fontsize') else 18, weight="bold")
-        ax.text(trans_label_x, trans_label_y, info_text, ha="left", va="bottom", fontsize=args.transcript_fontsize, weight="bold")
+    def cached(self, key, version):
+        """
+        Return the cached transcripts of key if they are of the given version
+        (file size and modification time), marking them as recently used,
+        or None.
+        """
+        with self.lock:
+            cached = self.gtfs.get(key)
+            if cached is None or cached[0] != version:
+                return None
+            self.gtfs.move_to_end(key)
+            return cached[1]
 
-    # 6) Choose color based on feature type.
-    color = args.exon_color if plot_feature.lower() == "exons" else args.CDS_color
+    def transcripts(self, gtf_file):
+        """
+        Return the {transcript_id: entries} dict of gtf_file, parsing it
+        on a cache miss. Raises OSError if the file cannot be read.
+        """
+        stat = os.stat(gtf_file)
+        key = os.path.abspath(gtf_file)
+        version = (stat.st_size, stat.st_mtime_ns)
+        transcripts = self.cached(key, version)
+        if transcripts is not None:
+            return transcripts
+        with self.lock:
+            file_lock = self.file_locks.setdefault(key, threading.Lock())
+        # Parsing runs under a lock of its own file only, so each file is
+        # parsed once however many requests for it arrive at the same time,
+        # while requests for other files are answered meanwhile.
+        with file_lock:
+            transcripts = self.cached(key, version)
+            if transcripts is not None:
+                return transcripts
+            transcripts = open_gtf_store(gtf_file)
+            if transcripts is None:
+                transcripts = dict(stream_gtf_transcripts(gtf_file, grouped=False))
+            with self.lock:
+                self.gtfs[key] = (version, transcripts)
+                self.gtfs.move_to_end(key)
+                while len(self.gtfs) > self.max_gtfs:
+                    self.gtfs.popitem(last=False)
+            return transcripts
 
-    # 7) Draw each feature as a rectangle and label only first and last features if requested.
-    for i, feat in enumerate(scaled_features):
-        x = feat['scaled_start']
-        width = feat['scaled_end'] - feat['scaled_start']
-        ax.add_patch(plt.Rectangle((x, rect_y), width, rect_height, color=color, ec='black'))
-        # Label only the first and last feature if --labels is set to "full".
-        if args.labels == "full" and (i == 0 or i == len(scaled_features) - 1):
-            if plot_feature.lower() == "exons":
-                label = "E01" if i == 0 else f"E{num_features:02d}"
-            else:
-                label = "CE01" if i == 0 else f"CE{num_features:02d}"
-            #### ax.text(x + width/2, rect_y + rect_height + 0.05, label, ha='center', va='bottom', fontsize=8, color="black")
-            ax.text(x + width/2, rect_y + rect_height + 0.05, label, ha='center', va='bottom', fontsize=10, color="black")
+def served_gtf_file(args, gtf_file):
+    """
+    Return the real path of the GTF file a /plot request names (gtf_file, or
+    the --gtf file if None), or None if it may not be read: only the --gtf
+    file and regular files under --serve_root (relative paths are taken from
+    it) are served.
+    """
+    if gtf_file is None:
+        gtf_file = args.gtf
+    if gtf_file is None:
+        return None
+    if args.gtf and os.path.realpath(gtf_file) == os.path.realpath(args.gtf):
+        return os.path.realpath(args.gtf)
+    if not args.serve_root:
+        return None
+    root = os.path.realpath(args.serve_root)
+    real_path = os.path.realpath(os.path.join(root, gtf_file))
+    if os.path.commonpath([root, real_path]) != root or not os.path.isfile(real_path):
+        return None
+    return real_path
 
+def query_options(args, query):
+    """
+    Return a copy of the command-line options with the plotting options
+    (and dpi) of a /plot request applied. Raises ValueError on an invalid
+    value.
+    """
+    options = argparse.Namespace(**vars(args))
+    dpi = int(query.get('dpi', args.dpi[0]))
+    if not 1 <= dpi <= SERVE_MAX_DPI:
+        raise ValueError(f"dpi must be between 1 and {SERVE_MAX_DPI}")
+    options.dpi = [dpi]
+    def flag(name):
+        return query[name].lower() in ("1", "true", "yes")
+    if 'full_scale' in query:
+        options.full_scale = flag('full_scale')
+    if 'dynamic_resize' in query:
+        options.dynamic_resize = flag('dynamic_resize')
+    if 'no_transcript_label' in query:
+        options.print_transcript_label = not flag('no_transcript_label')
+    if 'labels' in query:
+        if query['labels'] not in ("none", "full"):
+            raise ValueError("labels must be 'none' or 'full'")
+        options.labels = query['labels']
+    for name in ("exon_color", "CDS_color"):
+        if name in query:
+            setattr(options, name, query[name])
+    if 'transcript_fontsize' in query:
+        options.transcript_fontsize = int(query['transcript_fontsize'])
+    if 'figsize' in query:
+        options.figsize = [float(value) for value in query['figsize'].split(",")]
+        if len(options.figsize) != 2:
+            raise ValueError("figsize must be WIDTH,HEIGHT")
+        if not all(0 < value <= SERVE_MAX_FIGSIZE for value in options.figsize):
+            raise ValueError(f"figsize values must be greater than 0 and at most {SERVE_MAX_FIGSIZE}")
+    return options
 
-    # 8) Draw dashed lines (intron lines) between consecutive features.
-    for i in range(1, len(scaled_features)):
-        x0 = scaled_features[i-1]['scaled_end']
-        x1 = scaled_features[i]['scaled_start']
-        y_line = rect_y + rect_height/2
-        # You can make the dashes smaller by using a custom dash pattern:
-        # linestyle=(0, (1, 1)) or something similar.
-        #### ax.plot([x0, x1], [y_line, y_line], linestyle='dashed', color='gray')
-        # Custom dash pattern: (offset, (dash_length, gap_length))
-        # Custom dash pattern for shorter dashes.
-        ax.plot([x0, x1], [y_line, y_line], linestyle=(0, (1, 1)), color='gray')
+class RenderRequestHandler:
+    """
+    Handle the requests of the --serve mode (combined with http.server's
+    BaseHTTPRequestHandler by serve, so that http.server is only imported
+    when serving):
+        GET /plot?transcript=ID[&gtf=PATH][&feature=exons|CDS][&format=png|svg|pdf][&dpi=N]
+                  [&full_scale=1][&labels=full][&exon_color=C][&CDS_color=C][&figsize=W,H]
+                  [&dynamic_resize=1][&transcript_fontsize=N][&no_transcript_label=1]
+        GET /status
+    Omitted options take the values given on the command line.
+    """
+    def address_string(self):
+        # Unix socket clients have no address.
+        return self.client_address[0] if self.client_address else "unix-socket"
 
-    # 9) Set x-axis limits based on the data range (with a small padding).
-    x_min = min(f['scaled_start'] for f in scaled_features)
-    x_max = max(f['scaled_end'] for f in scaled_features)
-    ax.set_xlim(x_min - 10, x_max + 10)
-    ax.set_ylim(0, 2)
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
 
-    # 10) Dynamic resizing: adjust the figure width based on the x-range of the drawn content.
-    if args.dynamic_resize:
-        # Calculate the data width (we already have x_min and x_max)
-        data_width = (x_max - x_min) + 20  # Add padding equivalent to the axis limits.
-        # Define a conversion factor: in full_scale mode we assume 1000 data units per inch;
-        # in compressed mode we assume a 1:1 ratio.
-        conversion = 1000.0 if args.full_scale else 1.0
-        new_width_inches = data_width / conversion
-        # Ensure the new width is at least the original width and cap it to a maximum (e.g., 20 inches)
-        new_width_inches = max(new_width_inches, args.figsize[0])
-        new_width_inches = min(new_width_inches, 20)
-        fig.set_size_inches(new_width_inches, args.figsize[1])
+    def send_error_text(self, status, message):
+        self.send_body(status, "text/plain; charset=utf-8", (message + "\n").encode())
 
-    ax.axis('off')
-    return fig
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/status":
+            with self.server.gtf_cache.lock:
+                cached_gtfs = list(self.server.gtf_cache.gtfs)
+            status = {'version': script_version, 'cached_gtfs': cached_gtfs, 'jobs': self.server.args.jobs}
+            self.send_body(200, "application/json", json.dumps(status).encode())
+            return
+        if url.path != "/plot":
+            self.send_error_text(404, f"Unknown path {url.path}; use /plot or /status.")
+            return
+        args = self.server.args
+        gtf_file = query.get('gtf', args.gtf)
+        transcript_id = query.get('transcript', '').split('.')[0]
+        plot_feature = query.get('feature', "exons")
+        fmt = query.get('format', args.format[0])
+        if not gtf_file or not transcript_id:
+            self.send_error_text(400, "The transcript parameter (and gtf, unless the server was started with --gtf) is required.")
+            return
+        real_gtf_file = served_gtf_file(args, gtf_file)
+        if real_gtf_file is None:
+            self.send_error_text(403, f"The GTF file {gtf_file} is not served (only the --gtf file and files under --serve_root are).")
+            return
+        if plot_feature not in ("exons", "CDS") or fmt not in SERVE_CONTENT_TYPES:
+            self.send_error_text(400, "The feature must be exons or CDS, and the format png, svg or pdf.")
+            return
+        try:
+            options = query_options(args, query)
+            dpi = options.dpi[0]
+        except ValueError as error:
+            self.send_error_text(400, f"Invalid option: {error}")
+            return
+        try:
+            transcripts = self.server.gtf_cache.transcripts(real_gtf_file)
+        except OSError:
+            self.send_error_text(404, f"The GTF file {gtf_file} cannot be read.")
+            return
+        except GTFFormatError as error:
+            self.send_error_text(422, str(error))
+            return
+        entries = transcripts.get(transcript_id)
+        if not entries:
+            self.send_error_text(404, f"Transcript {transcript_id} not found in {gtf_file}.")
+            return
+        _, gene_name, exons, cds = prepare_transcript(transcript_id, entries, options)
+        features = exons if plot_feature == "exons" else cds
+        if not features:
+            self.send_error_text(404, f"Transcript {transcript_id} has no {plot_feature}.")
+            return
+        # Requests beyond what the worker pool can queue wait for a free
+        # slot, and are turned away if none frees up in time.
+        if not self.server.slots.acquire(timeout=SERVE_QUEUE_TIMEOUT):
+            self.send_error_text(503, "The server is busy; try again later.")
+            return
+        try:
+            body = self.server.executor.submit(figure_bytes, features, options, transcript_id, gene_name,
+                                               plot_feature, fmt, dpi).result()
+        except ValueError as error:
+            # Options matplotlib rejects, such as an unknown color.
+            self.send_error_text(400, f"Invalid option: {error}")
+            return
+        except Exception as error:
+            self.send_error_text(500, f"Rendering failed: {error!r}")
+            return
+        finally:
+            self.server.slots.release()
+        self.send_body(200, SERVE_CONTENT_TYPES[fmt], body)
+
+def serve(args):
+    """
+    Run the --serve mode: answer /plot requests with figure bytes, rendered
+    by a pool of args.jobs worker processes, until interrupted or terminated. args.serve is
+    HOST:PORT or unix:PATH. Parsed GTF files are kept in memory (see
+    ParsedGTFCache); the --gtf file, if given, is parsed before serving.
+    """
+    import signal
+    import socketserver
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(RenderRequestHandler, BaseHTTPRequestHandler):
+        pass
+
+    class RenderHTTPServer(ThreadingHTTPServer):
+        """
+        HTTP server listening on a TCP port, one thread per connection.
+        """
+        request_queue_size = 64
+
+    class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+        """
+        HTTP server listening on a Unix socket, one thread per connection.
+        """
+        daemon_threads = True
+        request_queue_size = 64
+
+    if args.serve.startswith("unix:"):
+        socket_path = args.serve[len("unix:"):]
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(socket_path, Handler)
+    else:
+        host, _, port = args.serve.rpartition(":")
+        if not port.isdigit():
+            sys.exit(f"Error: Invalid --serve address '{args.serve}'; expected HOST:PORT or unix:PATH.")
+        socket_path = None
+        server = RenderHTTPServer((host or "127.0.0.1", int(port)), Handler)
+    # Stop cleanly on SIGTERM (e.g., from a service manager) as on Ctrl-C.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server.args = args
+    server.gtf_cache = ParsedGTFCache(args.cached_gtfs)
+    server.slots = threading.BoundedSemaphore(SERVE_QUEUE_PER_JOB * args.jobs)
+    if args.gtf:
+        server.gtf_cache.transcripts(args.gtf)
+    # The workers (which import matplotlib) are started before the first request.
+    with start_render_pool(args.jobs) as executor:
+        server.executor = executor
+        print(f"Serving on {args.serve} with {args.jobs} worker(s); press Ctrl-C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if socket_path is not None and os.path.exists(socket_path):
+                os.remove(socket_path)
 
 #-------------------------------------------------------------------------------
 # Main Function
 #-------------------------------------------------------------------------------
 
 def main():
+    try:
+        check_dependencies()
+    except ImportError as error:
+        sys.exit(f"Error: {error}")
+
     parser = argparse.ArgumentParser(
       description="Generate transcript plots from GTF files.",
     formatter_class=argparse.RawTextHelpFormatter
@@ -350,12 +2687,52 @@ def main():
     parser.add_argument(
       "--gtf",
       type=str,
-      help="GTF file (required with -t)"
+      help=f"GTF file, plain or gzip/bgzip-compressed, or an annotation store ({GTF_STORE_SUFFIX}, see --convert)\n(required with --transcript, --all, --gene and --region)"
+    )
+    parser.add_argument(
+      "--unsorted_gtf",
+      action="store_true",
+      default=False,
+      help="With --all or --gene, the GTF is not grouped by gene: hold all transcripts until the end of the file"
     )
     group.add_argument(
       "--file",
       type=str,
-      help="File with multiple transcripts and GTF paths (2 tab-delimited columns)"
+      help="File with multiple transcripts and GTF paths (2 tab-delimited columns); '-' reads it from standard input"
+    )
+    group.add_argument(
+      "--all",
+      action="store_true",
+      help="Plot every transcript in the GTF file (requires --gtf)"
+    )
+    group.add_argument(
+      "--gene",
+      type=str,
+      help="Plot every transcript of a gene, given its gene ID or gene name (requires --gtf)"
+    )
+    group.add_argument(
+      "--region",
+      type=str,
+      help="Plot every transcript overlapping a region, given as CHROM:START-END (requires --gtf)"
+    )
+    group.add_argument(
+      "--build-index",
+      dest="build_index",
+      metavar="GTF",
+      type=str,
+      help=f"Write a transcript index next to the GTF file ({GTF_INDEX_SUFFIX}) and exit"
+    )
+    group.add_argument(
+      "--convert",
+      metavar="GTF",
+      type=str,
+      help=f"Convert the GTF file to a memory-mapped annotation store next to it ({GTF_STORE_SUFFIX}),\nusable in place of the GTF file everywhere, and exit"
+    )
+    group.add_argument(
+      "--serve",
+      metavar="ADDRESS",
+      type=str,
+      help="Run a render server on HOST:PORT (e.g., 127.0.0.1:8000) or unix:PATH, answering\nGET /plot?transcript=ID&gtf=PATH&format=png requests with figure bytes"
     )
     parser.add_argument(
       "--select",
@@ -398,16 +2775,18 @@ def main():
     )
     parser.add_argument(
       "--format",
+      nargs="+",
       type=str,
-      choices=["pdf","png", "svg"],
-      default="pdf",
-      help="Output file format"
+      choices=OUTPUT_FORMATS,
+      default=["pdf"],
+      help="Output file format(s); each figure is rendered once and saved to every format"
     )
     parser.add_argument(
       "--dpi",
+      nargs="+",
       type=int,
-      default=300,
-      help="Resolution (dpi) for output file (for png)"
+      default=[300],
+      help="Resolution(s) (dpi) for output files (for png); with several values, '_<dpi>dpi' is added to png file names"
     )
     parser.add_argument(
       "--dynamic_resize",
@@ -428,6 +2807,81 @@ def main():
       default=18,
       help="Font size for the transcript label (default: 18)"
     )
+    parser.add_argument(
+      "--jobs",
+      type=int,
+      default=1,
+      help="Number of worker processes used to render plots in --file, --all, --gene, --region and --serve modes (default: 1);\ncannot be combined with --pdf_pages, --contact_sheet, --stacked or --coordinates"
+    )
+    combined = parser.add_mutually_exclusive_group()
+    combined.add_argument(
+      "--coordinates",
+      type=str,
+      choices=["tsv", "json"],
+      help="Write the scaled feature coordinates as a TSV or JSON file instead of plotting (matplotlib is not imported)"
+    )
+    combined.add_argument(
+      "--pdf_pages",
+      action="store_true",
+      default=False,
+      help="Write all plots as pages of a single multi-page PDF file (ignores --format and --dpi)"
+    )
+    combined.add_argument(
+      "--contact_sheet",
+      type=int,
+      metavar="N",
+      help=f"Write all plots as contact-sheet PNG files with N plots per sheet, in a grid of up to {CONTACT_SHEET_COLUMNS} columns\n(at the first --dpi, up to {CONTACT_SHEET_MAX_DPI})"
+    )
+    parser.add_argument(
+      "--cached_gtfs",
+      type=int,
+      default=4,
+      metavar="N",
+      help="With --serve, number of parsed GTF files kept in memory (default: 4)"
+    )
+    parser.add_argument(
+      "--serve_root",
+      type=str,
+      metavar="DIR",
+      help="With --serve, also serve the GTF files under DIR (gtf=PATH, relative to DIR);\notherwise only the --gtf file is served"
+    )
+    parser.add_argument(
+      "--cache",
+      type=str,
+      metavar="DIR",
+      help="Render cache directory: figures whose features and plotting options are unchanged since\nan earlier run are linked from the cache instead of being rendered again"
+    )
+    parser.add_argument(
+      "--cache_size",
+      type=int,
+      default=1024,
+      metavar="MB",
+      help="Maximum size of the render cache in MiB; least recently used entries are removed (default: 1024)"
+    )
+    parser.add_argument(
+      "--profile",
+      action="store_true",
+      default=False,
+      help=f"Record the wall time and memory (RSS) of every stage of every transcript in {PROFILE_REPORT_NAME}\n(JSON lines) in the output directory, and print a summary table by stage"
+    )
+    parser.add_argument(
+      "--pstats",
+      action="store_true",
+      default=False,
+      help=f"Write a cProfile dump of the whole run (main process only) to {PROFILE_PSTATS_NAME}\nin the output directory; inspect it with python3 -m pstats"
+    )
+    parser.add_argument(
+      "--stacked",
+      action="store_true",
+      default=False,
+      help="Plot all transcripts (of --gene, --file, --region or --transcript) as stacked tracks of one figure\nper feature type, on a shared x-axis with the same intron compression for every track"
+    )
+    parser.add_argument(
+      "--resume",
+      type=str,
+      metavar="DIR",
+      help=f"Write into DIR (created if needed) and skip the outputs completed by earlier runs into DIR,\nas recorded in its journal ({JOURNAL_NAME}); missing or partial files are rendered again"
+    )
     parser.add_argument(
       "--output",
       type=str,
@@ -441,96 +2895,165 @@ def main():
       help="Show program version and exit"
     )
     args = parser.parse_args()
+    args.profile_report = None
+    run_start = time.perf_counter()
+
+    if args.jobs < 1:
+        parser.error("The --jobs value must be at least 1.")
+    if args.contact_sheet is not None and args.contact_sheet < 1:
+        parser.error("The --contact_sheet value must be at least 1.")
+    if (args.pdf_pages or args.contact_sheet or args.stacked or args.coordinates) and args.jobs > 1:
+        parser.error("The --pdf_pages, --contact_sheet, --stacked and --coordinates flags cannot be combined with --jobs.")
+    if args.stacked and (args.all or args.coordinates or args.pdf_pages or args.contact_sheet):
+        parser.error("The --stacked flag cannot be combined with --all, --coordinates, --pdf_pages or --contact_sheet.")
+    if args.resume and (args.output or args.coordinates or args.pdf_pages or args.contact_sheet or args.stacked):
+        parser.error("The --resume flag cannot be combined with --output, --coordinates, --pdf_pages, --contact_sheet or --stacked.")
+    if args.cached_gtfs < 1:
+        parser.error("The --cached_gtfs value must be at least 1.")
+    if args.cache_size < 1:
+        parser.error("The --cache_size value must be at least 1.")
+    if args.cache:
+        os.makedirs(args.cache, exist_ok=True)
 
-    if args.dpi > 2000:
+    # Remove duplicated formats and resolutions, keeping their order.
+    args.format = list(dict.fromkeys(args.format))
+    args.dpi = list(dict.fromkeys(args.dpi))
+
+    if max(args.dpi) > 2000:
       print("Warning: High DPI values may result in extremely large images.")
 
+    # Index mode: build the sidecar index and exit without plotting.
+    if args.build_index:
+        if not os.path.exists(args.build_index):
+            sys.exit(f"Error: The file '{args.build_index}' does not exist.")
+        if is_gtf_store(args.build_index):
+            sys.exit(f"Error: The file '{args.build_index}' is an annotation store, which needs no index.")
+        index_file = build_gtf_index(args.build_index)
+        print(f"Index written to {index_file}")
+        return
+
+    # Convert mode: write the annotation store and exit without plotting.
+    if args.convert:
+        if not os.path.exists(args.convert):
+            sys.exit(f"Error: The file '{args.convert}' does not exist.")
+        if is_gtf_store(args.convert):
+            sys.exit(f"Error: The file '{args.convert}' is already an annotation store.")
+        store_file = convert_gtf(args.convert)
+        print(f"Annotation store written to {store_file}")
+        return
+
+    # Server mode: render figures on request until interrupted.
+    if args.serve:
+        if args.gtf and not os.path.isfile(args.gtf):
+            sys.exit(f"Error: The file '{args.gtf}' does not exist or is not a regular file.")
+        if args.serve_root and not os.path.isdir(args.serve_root):
+            sys.exit(f"Error: The --serve_root directory '{args.serve_root}' does not exist.")
+        serve(args)
+        return
+
+    if args.pstats:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
     # For multi-transcript mode, verify that the file exists before creating any output directory.
-    if args.file and not os.path.exists(args.file):
+    if args.file and args.file != "-" and not os.path.exists(args.file):
         sys.exit(f"Error: The file '{args.file}' does not exist.")
 
-    # Determine intron display status for file naming:
-    introns_status = "Full_Introns" if args.full_scale else "Short_Introns"
-
     # Single transcript mode:
     if args.transcript:
         if not args.gtf:
             parser.error("The --gtf flag is required when using --transcript.")
         transcript_id = args.transcript.split('.')[0]
+        start = stage_start(args)
         entries = parse_gtf(args.gtf, transcript_id)
+        record_stage(args, "parse", start, transcript_id)
         if not entries:
             sys.exit(f"Transcript {transcript_id} not found in {args.gtf}.")
-        gene_name = entries[0]['attributes'].get('gene_name', transcript_id)
-        exons, cds = process_features(entries)
-        exons = compute_lengths(exons)
-        if cds:
-            cds = compute_lengths(cds)
 
         # Create output directory only after verifying the transcript exists.
-        out_dir = create_output_dir(args.output) if args.output else create_output_dir()
-
-        if args.select in ("exons", "both"):
-            fig = plot_transcript(exons, args, transcript_id, gene_name, plot_feature="exons")
-            out_path = os.path.join(out_dir, f"{transcript_id}_exons_{introns_status}.{args.format}")
-            #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight')
-            #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.1)
-            fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.05)
-            plt.close(fig)
-        if args.select in ("CDS", "both") and cds:
-            fig = plot_transcript(cds, args, transcript_id, gene_name, plot_feature="CDS")
-            out_path = os.path.join(out_dir, f"{transcript_id}_CDS_{introns_status}.{args.format}")
-            #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight')
-            #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.1)
-            fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.05)
-            plt.close(fig)
+        out_dir = output_directory(args)
+
+        render_transcripts([(transcript_id, entries)], args, out_dir)
 
     # Multiple transcripts mode:
     elif args.file:
-        out_dir = create_output_dir(args.output) if args.output else create_output_dir()
-        output_files_created = 0
+        out_dir = output_directory(args)
 
-        with open(args.file) as f:
-            for line in f:
-                parts = line.strip().split("\t")
-                if len(parts) != 2:
-                    print(f"Skipping invalid line: {line.strip()}")
-                    continue
-                transcript_id, gtf_file = parts
-                transcript_id = transcript_id.split('.')[0]
-                if not os.path.exists(gtf_file) or os.path.getsize(gtf_file) == 0:
-                    print(f"GTF file {gtf_file} for transcript {transcript_id} does not exist or is empty. Skipping.")
-                    continue
-                entries = parse_gtf(gtf_file, transcript_id)
-                if not entries:
-                    print(f"Transcript {transcript_id} not found in {gtf_file}. Skipping.")
-                    continue
-                gene_name = entries[0]['attributes'].get('gene_name', transcript_id)
-                exons, cds = process_features(entries)
-                exons = compute_lengths(exons)
-                if cds:
-                    cds = compute_lengths(cds)
-
-                if args.select in ("exons", "both"):
-                    fig = plot_transcript(exons, args, transcript_id, gene_name, plot_feature="exons")
-                    out_path = os.path.join(out_dir, f"{transcript_id}_exons_{introns_status}.{args.format}")
-                    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight')
-                    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.1)
-                    fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.05)
-                    plt.close(fig)
-                    output_files_created += 1
-                if args.select in ("CDS", "both") and cds:
-                    fig = plot_transcript(cds, args, transcript_id, gene_name, plot_feature="CDS")
-                    out_path = os.path.join(out_dir, f"{transcript_id}_CDS_{introns_status}.{args.format}")
-                    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight')
-                    #### fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.1)
-                    fig.savefig(out_path, format=args.format, dpi=args.dpi, bbox_inches='tight', pad_inches=0.05)
-                    plt.close(fig)
-                    output_files_created += 1
-
-        # If no valid transcript was processed, remove the output directory.
-        if output_files_created == 0:
-            import shutil
+        # Read the whole manifest first so that each GTF is parsed only once,
+        # however many transcripts are requested from it. GTF files are then
+        # parsed in a background thread while the figures are rendered.
+        records = read_manifest(args.file)
+        transcripts = prefetch(manifest_transcripts(records, args))
+        total = sum(1 for _, transcript_id, _ in records if transcript_id is not None)
+        output_files_created = render_transcripts(transcripts, args, out_dir, total)
+
+        # If no valid transcript was processed, remove the output directory
+        # (unless it is a --resume directory).
+        if output_files_created == 0 and not args.resume:
+            shutil.rmtree(out_dir)
+
+    # Region mode (every transcript overlapping a genomic region):
+    elif args.region:
+        if not args.gtf:
+            parser.error("The --gtf flag is required when using --region.")
+        region = parse_region(args.region)
+        if region is None:
+            parser.error(f"Invalid region '{args.region}'; expected CHROM:START-END.")
+        if not os.path.exists(args.gtf):
+            sys.exit(f"Error: The file '{args.gtf}' does not exist.")
+        chrom, start, end = region
+        parse_start = stage_start(args)
+        transcripts = parse_gtf_region(args.gtf, chrom, start, end)
+        record_stage(args, "parse", parse_start, gtf=args.gtf)
+        if not transcripts:
+            sys.exit(f"No transcripts found in region {args.region} of {args.gtf}.")
+        out_dir = output_directory(args)
+        output_files_created = render_transcripts(transcripts.items(), args, out_dir, len(transcripts))
+
+        # If no valid transcript was processed, remove the output directory
+        # (unless it is a --resume directory).
+        if output_files_created == 0 and not args.resume:
             shutil.rmtree(out_dir)
 
+    # Whole-annotation modes (every transcript, or every transcript of a gene):
+    else:
+        if not args.gtf:
+            parser.error("The --gtf flag is required when using --all or --gene.")
+        if not os.path.exists(args.gtf):
+            sys.exit(f"Error: The file '{args.gtf}' does not exist.")
+        out_dir = output_directory(args)
+
+        # The GTF is streamed once, in a background thread; each transcript is
+        # plotted as soon as its gene block ends, so only one gene's features
+        # (and a few transcripts queued for rendering) are held in memory.
+        transcripts = prefetch(stream_gtf_transcripts(args.gtf, gene=args.gene, grouped=not args.unsorted_gtf))
+        if args.profile:
+            transcripts = profile_transcripts(transcripts, args)
+        output_files_created = render_transcripts(transcripts, args, out_dir)
+
+        # If no valid transcript was processed, remove the output directory
+        # (unless it is a --resume directory).
+        if output_files_created == 0:
+            if not args.resume:
+                shutil.rmtree(out_dir)
+            if args.gene:
+                sys.exit(f"Gene {args.gene} not found in {args.gtf}.")
+
+    # Keep the render cache within its size limit.
+    if args.cache:
+        prune_render_cache(args.cache, args.cache_size)
+
+    # Profiling reports (skipped if the output directory was removed):
+    if os.path.isdir(out_dir):
+        if args.profile:
+            write_profile_summary(args, out_dir, time.perf_counter() - run_start)
+        if args.pstats:
+            profiler.disable()
+            profiler.dump_stats(os.path.join(out_dir, PROFILE_PSTATS_NAME))
+
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except GTFFormatError as error:
+        sys.exit(f"Error: {error}")